@@ -0,0 +1,67 @@
+"""
+In-process cache for slow-changing read paths.
+
+WHY: Dashboard endpoints recompute the same aggregates on every view,
+even though the underlying data changes a few times a day at most.
+Thinking OS runs as a single process on SQLite, so a small TTL cache
+in memory gives the benefit of an external cache (Redis, memcached)
+without adding a server dependency.
+
+Cached values are shared between callers - treat them as read-only.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe key/value store where every entry expires after a TTL.
+
+    WHY: Uvicorn serves sync routes from a thread pool, so reads and
+    writes can interleave. A single lock is plenty for the handful of
+    keys this app keeps.
+    """
+
+    def __init__(self, default_ttl: float = 300.0):
+        self.default_ttl = default_ttl
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for `ttl` seconds (default_ttl if not given)."""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+
+    def invalidate(self, prefix: str) -> None:
+        """
+        Drop every key starting with `prefix`.
+
+        WHY: Keys usually embed a date or parameters, so writers
+        invalidate a whole family ("insights:") rather than one key.
+        """
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        """Drop everything (useful in tests)."""
+        with self._lock:
+            self._data.clear()
+
+
+cache = TTLCache()
@@ -32,6 +32,13 @@ class Settings(BaseSettings):
     SIMILARITY_THRESHOLD: float = 0.3
     BLOCKER_REPEAT_THRESHOLD: int = 3
     REVISION_WINDOW_DAYS: int = 7
+    RECALL_CANDIDATE_LIMIT: int = 50
+    RECALL_MMR_LAMBDA: float = 0.5
+    
+    INSIGHTS_CACHE_TTL_SECONDS: int = 300
+    PATTERN_STATS_CACHE_TTL_SECONDS: int = 30
+    RECALL_CACHE_TTL_SECONDS: int = 60
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 600
     
     GEMINI_API_KEY: Optional[str] = None
     
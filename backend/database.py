@@ -8,9 +8,10 @@ WHY: Centralizing database setup enables:
 - Proper connection pooling and cleanup
 """
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import bindparam, create_engine, event, func, insert, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex
 
 from config import settings
 
@@ -28,11 +29,28 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor.close()
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
 
 Base = declarative_base()
 
 
+def db_now():
+    """
+    SQL expression for the current UTC time, to the millisecond.
+    
+    WHY: func.now() renders CURRENT_TIMESTAMP on SQLite, which drops
+    the fractional seconds. Rows stamped by the database would then
+    sort before their own Python-stamped created_at and tie with
+    every other write in the same second.
+    """
+    return func.strftime("%Y-%m-%d %H:%M:%f", "now")
+
+
 def get_db():
     """
     Dependency that provides database session.
@@ -62,3 +80,307 @@ def init_db():
     from models import entry, pattern, reflection, analytics, recommendation, learning_plan
     
     Base.metadata.create_all(bind=engine)
+    _add_blocker_hash()
+    _add_blocker_prefix()
+    _add_pattern_success_count()
+    _add_search_tokens()
+    _dedupe_entry_patterns()
+    _create_missing_indexes()
+    _backfill_pattern_domains()
+    _backfill_daily_tasks()
+    _backfill_blocker_entries()
+    _create_entry_search()
+
+
+def _create_missing_indexes():
+    """
+    Create indexes declared on models but missing from existing tables.
+    
+    WHY: create_all skips tables that already exist, so indexes added to
+    a model later would only reach freshly created databases.
+    """
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _add_blocker_hash():
+    """
+    Add blocker_analytics.blocker_hash to databases created before it existed.
+    
+    WHY: Runs before _create_missing_indexes, whose unique index on the
+    column needs it to exist. Hashes are computed in Python since SQLite
+    has no sha1(); a later row sharing a prefix keeps a NULL hash, so
+    the oldest row stays the one new occurrences are counted against.
+    """
+    from models.analytics import BlockerAnalytics
+    
+    columns = {c["name"] for c in inspect(engine).get_columns("blocker_analytics")}
+    if "blocker_hash" in columns:
+        return
+    
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE blocker_analytics ADD COLUMN blocker_hash VARCHAR(40)"
+        ))
+        rows = conn.execute(text(
+            "SELECT id, blocker_text FROM blocker_analytics ORDER BY id"
+        ))
+        hashes = {}
+        for blocker_id, blocker_text in rows:
+            hashes.setdefault(BlockerAnalytics.hash_for(blocker_text), blocker_id)
+        if hashes:
+            conn.execute(
+                text("UPDATE blocker_analytics SET blocker_hash = :h WHERE id = :id"),
+                [{"h": h, "id": blocker_id} for h, blocker_id in hashes.items()],
+            )
+
+
+# Token column -> the source columns join_tokens() is computed from,
+# mirroring each model's validator.
+SEARCH_TOKEN_COLUMNS = {
+    "entries": {"title_tokens": ("title",)},
+    "reflections": {"search_tokens": ("context", "key_pattern", "initial_blocker")},
+    "patterns": {"name_tokens": ("name",), "trigger_tokens": ("common_triggers",)},
+}
+
+
+def _add_blocker_prefix():
+    """
+    Add reflections.initial_blocker_prefix to databases created before it.
+    
+    WHY: Runs before _create_missing_indexes, which indexes the column,
+    and before anything loads Reflection. Filled in Python so the
+    prefix matches what the model's validator computes.
+    """
+    from models.reflection import blocker_prefix
+    
+    columns = {c["name"] for c in inspect(engine).get_columns("reflections")}
+    if "initial_blocker_prefix" in columns:
+        return
+    
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE reflections ADD COLUMN initial_blocker_prefix VARCHAR(50)"
+        ))
+        rows = conn.execute(text("SELECT id, initial_blocker FROM reflections")).all()
+        if rows:
+            conn.execute(
+                text("UPDATE reflections SET initial_blocker_prefix = :p WHERE id = :id"),
+                [{"p": blocker_prefix(blocker), "id": reflection_id} for reflection_id, blocker in rows],
+            )
+
+
+def _add_search_tokens():
+    """
+    Add and fill the *_tokens columns on databases created before them.
+    
+    WHY: Filled with plain SQL rather than through the models, so the
+    backfill never depends on other columns a migration has yet to add.
+    """
+    from search_tokens import join_tokens
+    
+    with engine.begin() as conn:
+        for table, token_columns in SEARCH_TOKEN_COLUMNS.items():
+            existing = {c["name"] for c in inspect(conn).get_columns(table)}
+            for column, sources in token_columns.items():
+                if column in existing:
+                    continue
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} TEXT"))
+                rows = conn.execute(text(
+                    f"SELECT id, {', '.join(sources)} FROM {table}"
+                )).all()
+                if rows:
+                    conn.execute(
+                        text(f"UPDATE {table} SET {column} = :tokens WHERE id = :id"),
+                        [{"tokens": join_tokens(*row[1:]), "id": row[0]} for row in rows],
+                    )
+
+
+def _add_pattern_success_count():
+    """
+    Add patterns.success_count to databases created before it existed.
+    
+    WHY: create_all never alters existing tables. The counter is seeded
+    from entry_patterns, matching how success_rate was computed before.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("patterns")}
+    if "success_count" in columns:
+        return
+    
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE patterns ADD COLUMN success_count INTEGER DEFAULT 0"
+        ))
+        conn.execute(text(
+            "UPDATE patterns SET success_count = ("
+            "SELECT COUNT(*) FROM entry_patterns "
+            "WHERE entry_patterns.pattern_id = patterns.id "
+            "AND entry_patterns.was_successful = 1)"
+        ))
+
+
+def _dedupe_entry_patterns():
+    """
+    Drop repeated (entry, pattern) links before their unique index is built.
+    
+    WHY: Databases created before ix_entry_patterns_entry_id_pattern_id
+    may link an entry to a pattern more than once, and the CREATE UNIQUE
+    INDEX in _create_missing_indexes would fail on them. The oldest link
+    is kept and the affected patterns' counters are recounted from the
+    links that remain.
+    """
+    with engine.begin() as conn:
+        indexes = {i["name"] for i in inspect(conn).get_indexes("entry_patterns")}
+        if "ix_entry_patterns_entry_id_pattern_id" in indexes:
+            return
+        
+        pattern_ids = [pattern_id for (pattern_id,) in conn.execute(text(
+            "SELECT DISTINCT pattern_id FROM entry_patterns "
+            "GROUP BY entry_id, pattern_id HAVING COUNT(*) > 1"
+        ))]
+        if not pattern_ids:
+            return
+        
+        conn.execute(text(
+            "DELETE FROM entry_patterns WHERE id NOT IN ("
+            "SELECT MIN(id) FROM entry_patterns GROUP BY entry_id, pattern_id)"
+        ))
+        affected = {"ids": pattern_ids}
+        conn.execute(text(
+            "UPDATE patterns SET "
+            "usage_count = (SELECT COUNT(*) FROM entry_patterns "
+            "WHERE entry_patterns.pattern_id = patterns.id), "
+            "success_count = (SELECT COUNT(*) FROM entry_patterns "
+            "WHERE entry_patterns.pattern_id = patterns.id "
+            "AND entry_patterns.was_successful = 1) "
+            "WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)), affected)
+        # SET expressions read the old row, so the rate is a second pass.
+        conn.execute(text(
+            "UPDATE patterns SET success_rate = CASE WHEN usage_count > 0 "
+            "THEN CAST(success_count AS FLOAT) / usage_count ELSE 0.0 END "
+            "WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)), affected)
+
+
+def _backfill_pattern_domains():
+    """
+    Populate pattern_domains for databases created before it existed.
+    
+    WHY: create_all adds the table empty. Re-assigning domain_tags
+    runs Pattern's validator, which writes the per-tag rows.
+    """
+    from models.pattern import Pattern, PatternDomain
+    
+    db = SessionLocal()
+    try:
+        if db.query(PatternDomain.id).first() is not None:
+            return
+        for pattern in db.query(Pattern).filter(Pattern.domain_tags.isnot(None)):
+            pattern.domain_tags = pattern.domain_tags
+        db.commit()
+    finally:
+        db.close()
+
+
+def _backfill_daily_tasks():
+    """
+    Populate daily_tasks rows for schedules stored only as JSON.
+    
+    WHY: Today's view reads DailyTask rows; plans generated before those
+    rows were written would otherwise show no tasks.
+    """
+    from models.learning_plan import DailyTask, WeeklySchedule
+    
+    db = SessionLocal()
+    try:
+        if db.query(DailyTask.id).first() is not None:
+            return
+        rows = []
+        for schedule in db.query(WeeklySchedule).filter(WeeklySchedule.daily_tasks.isnot(None)):
+            rows.extend(DailyTask.rows_from_schedule(schedule.id, schedule.daily_tasks))
+        if rows:
+            db.execute(insert(DailyTask), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+ENTRY_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS entry_search "
+    "USING fts5(title, context, key_pattern, initial_blocker)",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_entry_insert
+    AFTER INSERT ON entries BEGIN
+        INSERT INTO entry_search (rowid, title) VALUES (new.id, new.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_entry_title
+    AFTER UPDATE OF title ON entries BEGIN
+        UPDATE entry_search SET title = new.title WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_entry_delete
+    AFTER DELETE ON entries BEGIN
+        DELETE FROM entry_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_reflection_insert
+    AFTER INSERT ON reflections BEGIN
+        UPDATE entry_search SET context = new.context,
+            key_pattern = new.key_pattern, initial_blocker = new.initial_blocker
+        WHERE rowid = new.entry_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_reflection_update
+    AFTER UPDATE OF context, key_pattern, initial_blocker ON reflections BEGIN
+        UPDATE entry_search SET context = new.context,
+            key_pattern = new.key_pattern, initial_blocker = new.initial_blocker
+        WHERE rowid = new.entry_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entry_search_reflection_delete
+    AFTER DELETE ON reflections BEGIN
+        UPDATE entry_search SET context = NULL, key_pattern = NULL,
+            initial_blocker = NULL
+        WHERE rowid = old.entry_id;
+    END""",
+)
+
+
+def _backfill_blocker_entries():
+    """
+    Move blocker_analytics.entry_ids JSON lists into blocker_entries.
+    
+    WHY: The association table replaced the JSON column; databases that
+    predate it start with an empty table. Ids of entries deleted since
+    are dropped, as the foreign key would reject them.
+    """
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM blocker_entries LIMIT 1")).first():
+            return
+        conn.execute(text(
+            "INSERT OR IGNORE INTO blocker_entries (blocker_id, entry_id) "
+            "SELECT b.id, j.value FROM blocker_analytics b, json_each(b.entry_ids) j "
+            "WHERE j.value IN (SELECT id FROM entries)"
+        ))
+
+
+def _create_entry_search():
+    """
+    Create the entry_search FTS5 index and its sync triggers.
+    
+    WHY: Recall ranks entries with MATCH/bm25 instead of loading them
+    all. Triggers keep the index current for every writer, including
+    bulk UPDATE/DELETE statements that bypass ORM events. Existing
+    rows are indexed once, when the table is first created.
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'entry_search'"
+        )).first()
+        for statement in ENTRY_SEARCH_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text(
+                "INSERT INTO entry_search "
+                "(rowid, title, context, key_pattern, initial_blocker) "
+                "SELECT e.id, e.title, r.context, r.key_pattern, r.initial_blocker "
+                "FROM entries e LEFT JOIN reflections r ON r.entry_id = e.id"
+            ))
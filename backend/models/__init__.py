@@ -6,9 +6,9 @@ All models are importable from `models` directly.
 """
 
 from models.entry import Entry, EntryType
-from models.pattern import Pattern, EntryPattern
+from models.pattern import Pattern, EntryPattern, PatternDomain
 from models.reflection import Reflection
-from models.analytics import BlockerAnalytics, RevisionHistory, DailyStats
+from models.analytics import BlockerAnalytics, RevisionHistory, DailyStats, blocker_entries
 from models.recommendation import (
     Recommendation, RecommendationType, 
     RecommendationPriority, RecommendationDomain
@@ -23,8 +23,10 @@ __all__ = [
     "EntryType", 
     "Pattern",
     "EntryPattern",
+    "PatternDomain",
     "Reflection",
     "BlockerAnalytics",
+    "blocker_entries",
     "RevisionHistory",
     "DailyStats",
     "Recommendation",
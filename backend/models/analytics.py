@@ -9,15 +9,28 @@ WHY: The intelligence layer needs historical data to:
 These models support the "you struggled with X last 3 times" signals.
 """
 
+import hashlib
 from datetime import datetime
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, 
-    ForeignKey, Float, Boolean
+    ForeignKey, Float, Boolean, Index, Table
 )
 from sqlalchemy.orm import relationship
 
 from database import Base
+from models.reflection import blocker_prefix
+
+
+# Which entries hit each blocker. A plain association table: recording
+# an occurrence is one INSERT ... ON CONFLICT DO NOTHING, with foreign
+# keys, instead of rewriting a JSON list on the blocker row.
+blocker_entries = Table(
+    "blocker_entries",
+    Base.metadata,
+    Column("blocker_id", Integer, ForeignKey("blocker_analytics.id", ondelete="CASCADE"), primary_key=True),
+    Column("entry_id", Integer, ForeignKey("entries.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
 
 
 class BlockerAnalytics(Base):
@@ -29,7 +42,8 @@ class BlockerAnalytics(Base):
     address the root cause.
     
     DESIGN: Extracted from reflections' initial_blocker field.
-    Fuzzy matching or embedding similarity groups similar blockers.
+    Blockers sharing the same normalized 50-char prefix are grouped
+    via blocker_hash; fuzzy or embedding matching can come later.
     """
     __tablename__ = "blocker_analytics"
     
@@ -37,10 +51,16 @@ class BlockerAnalytics(Base):
     
     blocker_text = Column(Text, nullable=False)
     
+    # sha1 of the normalized prefix: an indexed equality lookup instead
+    # of ILIKE '%prefix%', which can only be answered by a full scan.
+    blocker_hash = Column(String(40), nullable=True, unique=True, index=True)
+    
     blocker_category = Column(String(200), nullable=True, index=True)
     
     occurrence_count = Column(Integer, default=1)
-    entry_ids = Column(Text, nullable=False)
+    # Legacy JSON list of entry ids, superseded by blocker_entries. Kept
+    # (defaulting to empty) because older databases declare it NOT NULL.
+    entry_ids = Column(Text, nullable=False, default="[]")
     
     times_resolved = Column(Integer, default=0)
     avg_resolution_time_minutes = Column(Float, nullable=True)
@@ -50,8 +70,15 @@ class BlockerAnalytics(Base):
     first_seen_at = Column(DateTime, default=datetime.utcnow)
     last_seen_at = Column(DateTime, default=datetime.utcnow)
     
+    entries = relationship("Entry", secondary=blocker_entries, passive_deletes=True)
+    
     def __repr__(self):
         return f"<BlockerAnalytics(id={self.id}, count={self.occurrence_count})>"
+    
+    @staticmethod
+    def hash_for(blocker_text: str) -> str:
+        """blocker_hash for a blocker: sha1 of its Reflection-style prefix."""
+        return hashlib.sha1(blocker_prefix(blocker_text).encode()).hexdigest()
 
 
 class RevisionHistory(Base):
@@ -66,10 +93,13 @@ class RevisionHistory(Base):
     FUTURE: Can implement SM-2 or similar algorithm.
     """
     __tablename__ = "revision_history"
+    __table_args__ = (
+        Index("ix_revision_history_entry_id_revised_at", "entry_id", "revised_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
-    entry_id = Column(Integer, ForeignKey("entries.id"), nullable=True)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), nullable=True)
     pattern_id = Column(Integer, ForeignKey("patterns.id"), nullable=True)
     
     revision_type = Column(String(50), nullable=False)
@@ -16,11 +16,12 @@ from typing import Optional
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, 
-    Enum, Boolean, Float
+    Enum, Boolean, Float, Index, LargeBinary, column, table
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from database import Base
+from search_tokens import join_tokens
 
 
 class EntryType(enum.Enum):
@@ -51,13 +52,28 @@ class Entry(Base):
     - difficulty: Self-assessed, helps track progress in difficulty levels
     - time_spent_minutes: Awareness of time investment
     - is_complete: Allows saving drafts, but incomplete entries don't count
-    - embedding: Future hook for semantic search (stores vector as JSON)
+    - title_tokens: Tokenized title for recall scoring (maintained automatically)
+    - embedding: Semantic search vector (int8 bytes), set when embeddings are enabled
     """
     __tablename__ = "entries"
+    __table_args__ = (
+        Index("ix_entries_is_complete_created_at", "is_complete", "created_at"),
+        Index(
+            "ix_entries_entry_type_is_complete_created_at",
+            "entry_type", "is_complete", "created_at"
+        ),
+        # Covers the per-type count/difficulty aggregate of completed
+        # entries: read in group order, no table lookups or temp sort.
+        Index(
+            "ix_entries_is_complete_entry_type_difficulty",
+            "is_complete", "entry_type", "difficulty"
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
     title = Column(String(500), nullable=False, index=True)
+    title_tokens = Column(Text, nullable=True)
     entry_type = Column(Enum(EntryType), nullable=False, index=True)
     
     source_url = Column(String(2000), nullable=True)
@@ -75,20 +91,43 @@ class Entry(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    embedding = Column(Text, nullable=True)
+    embedding = Column(LargeBinary, nullable=True)
     
     reflection = relationship(
         "Reflection", 
         back_populates="entry", 
         uselist=False,  # One-to-one
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     patterns = relationship(
         "EntryPattern",
         back_populates="entry",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     def __repr__(self):
         return f"<Entry(id={self.id}, title='{self.title[:30]}...', type={self.entry_type.value})>"
+    
+    @validates("title")
+    def _sync_title_tokens(self, key, value):
+        """Keep title_tokens in step with title, so recall never re-tokenizes it."""
+        self.title_tokens = join_tokens(value)
+        return value
+
+
+# WHY: Full-text index over each entry's title and reflection, so
+# recall can rank candidates in SQLite instead of scoring every entry
+# in Python. It is an FTS5 virtual table (rowid = entries.id) kept in
+# sync by triggers created in database.init_db, so it is declared as a
+# plain table construct rather than a mapped model.
+entry_search = table(
+    "entry_search",
+    column("rowid", Integer),
+    column("title", Text),
+    column("context", Text),
+    column("key_pattern", Text),
+    column("initial_blocker", Text),
+)
@@ -18,11 +18,19 @@ from typing import Optional
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Date,
-    Enum, Boolean, Float, JSON, ForeignKey
+    Enum, Boolean, Float, JSON, ForeignKey, Index
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
-from database import Base
+from database import Base, db_now
+
+
+# Day keys used in WeeklySchedule.daily_tasks, mapped to date.weekday()
+DAY_NAMES = {
+    name: index for index, name in enumerate(
+        ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    )
+}
 
 
 class PlanType(enum.Enum):
@@ -66,6 +74,8 @@ class LearningPlan(Base):
     - Adaptability based on performance
     """
     __tablename__ = "learning_plans"
+    # Fetch DB-generated timestamps back via RETURNING on flush.
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -104,8 +114,8 @@ class LearningPlan(Base):
     
     generated_by = Column(String(100), default="gemini")
     
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=db_now(), index=True)
+    updated_at = Column(DateTime, default=db_now(), onupdate=db_now())
     
     milestones = relationship(
         "PlanMilestone",
@@ -130,6 +140,9 @@ class PlanMilestone(Base):
     Each milestone should feel accomplishable in 1-2 weeks.
     """
     __tablename__ = "plan_milestones"
+    __table_args__ = (
+        Index("ix_plan_milestones_plan_id_status", "plan_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey("learning_plans.id"), nullable=False)
@@ -170,6 +183,13 @@ class WeeklySchedule(Base):
     WHY: Daily/weekly structure prevents overwhelm and ensures consistent progress.
     """
     __tablename__ = "weekly_schedules"
+    __table_args__ = (
+        Index(
+            "ix_weekly_schedules_plan_id_week_dates",
+            "plan_id", "week_start_date", "week_end_date"
+        ),
+        Index("ix_weekly_schedules_plan_id_is_completed", "plan_id", "is_completed"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey("learning_plans.id"), nullable=False)
@@ -195,6 +215,26 @@ class WeeklySchedule(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     plan = relationship("LearningPlan", back_populates="weekly_schedules")
+    tasks = relationship(
+        "DailyTask",
+        cascade="all, delete-orphan",
+        order_by="DailyTask.id"
+    )
+    
+    @validates("daily_tasks")
+    def _sync_tasks(self, key, value):
+        """
+        Mirror daily_tasks into DailyTask rows.
+        
+        WHY: The week view reads the JSON, today's view reads the rows.
+        Syncing here catches ORM writers; bulk inserts call
+        DailyTask.rows_from_schedule themselves.
+        """
+        self.tasks = [
+            DailyTask(**row)
+            for row in DailyTask.rows_from_schedule(self.id, value)
+        ]
+        return value
 
 
 class DailyTask(Base):
@@ -202,8 +242,13 @@ class DailyTask(Base):
     Individual task to complete on a specific day.
     
     WHY: Granular tracking of daily activities within a plan.
+    Rows mirror WeeklySchedule.daily_tasks so today's view can load
+    one day's tasks instead of every current week's JSON blob.
     """
     __tablename__ = "daily_tasks"
+    __table_args__ = (
+        Index("ix_daily_tasks_schedule_id_day_of_week", "schedule_id", "day_of_week"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     schedule_id = Column(Integer, ForeignKey("weekly_schedules.id"), nullable=False)
@@ -226,3 +271,31 @@ class DailyTask(Base):
     notes = Column(Text, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def rows_from_schedule(cls, schedule_id: Optional[int], daily_tasks: Optional[dict]) -> list:
+        """
+        Flatten a schedule's {"monday": [task, ...]} JSON into insert rows.
+        
+        day_of_week follows date.weekday() (Monday is 0); unknown day
+        keys are skipped.
+        """
+        rows = []
+        for day_name, tasks in (daily_tasks or {}).items():
+            day = DAY_NAMES.get(str(day_name).lower())
+            if day is None or not isinstance(tasks, list):
+                continue
+            for task in tasks:
+                if not isinstance(task, dict):
+                    continue
+                rows.append({
+                    "schedule_id": schedule_id,
+                    "day_of_week": day,
+                    "title": task.get("title") or "Task",
+                    "description": task.get("description"),
+                    "task_type": task.get("type") or "practice",
+                    "resource_url": task.get("resource_url"),
+                    "resource_name": task.get("resource_name"),
+                    "estimated_minutes": task.get("estimated_minutes") or 30,
+                })
+        return rows
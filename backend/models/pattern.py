@@ -17,14 +17,24 @@ DESIGN: Many-to-many relationship with entries allows:
 """
 
 from datetime import datetime
+from typing import List, Optional
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, 
-    ForeignKey, Float
+    ForeignKey, Float, Index, func
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
-from database import Base
+from database import Base, db_now
+from search_tokens import join_tokens
+
+
+def _split_tags(domain_tags: Optional[str]) -> List[str]:
+    """Split a CSV of domain tags into unique, stripped, lowercase tags."""
+    if not domain_tags:
+        return []
+    tags = (t.strip().lower() for t in domain_tags.split(","))
+    return list(dict.fromkeys(t for t in tags if t))
 
 
 class Pattern(Base):
@@ -36,9 +46,18 @@ class Pattern(Base):
     - description: What this pattern means to YOU
     - domain_tags: Which domains this applies to
     - usage_count: How often you've seen this (auto-tracked)
+    - success_count: Uses that led to success (running counter)
     - success_rate: How often recognizing this led to success
     """
     __tablename__ = "patterns"
+    __table_args__ = (
+        Index("ix_patterns_usage_count_success_rate", "usage_count", "success_rate"),
+        Index("ix_patterns_usage_count_id", "usage_count", "id"),
+        Index("ix_patterns_created_at_id", "created_at", "id"),
+    )
+    # Fetch the DB-generated timestamps back via RETURNING on flush
+    # instead of leaving them expired until the next attribute access.
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -50,19 +69,110 @@ class Pattern(Base):
     
     common_triggers = Column(Text, nullable=True)
     
+    # Tokenized name/triggers for recall, maintained by validators.
+    name_tokens = Column(Text, nullable=True)
+    trigger_tokens = Column(Text, nullable=True)
+    
     common_mistakes = Column(Text, nullable=True)
     
     usage_count = Column(Integer, default=0)
+    success_count = Column(Integer, default=0)
     success_rate = Column(Float, default=0.0)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=db_now())
+    updated_at = Column(DateTime, default=db_now(), onupdate=db_now())
     last_used_at = Column(DateTime, nullable=True)
     
     entries = relationship("EntryPattern", back_populates="pattern")
+    domains = relationship(
+        "PatternDomain",
+        back_populates="pattern",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     
     def __repr__(self):
         return f"<Pattern(id={self.id}, name='{self.name}')>"
+    
+    @property
+    def domain_list(self) -> List[str]:
+        """domain_tags split into normalized (stripped, lowercase) tags."""
+        return _split_tags(self.domain_tags)
+    
+    @validates("name")
+    def _sync_name_tokens(self, key, value):
+        self.name_tokens = join_tokens(value)
+        return value
+    
+    @validates("common_triggers")
+    def _sync_trigger_tokens(self, key, value):
+        self.trigger_tokens = join_tokens(value)
+        return value
+    
+    @validates("domain_tags")
+    def _sync_domains(self, key, value):
+        """
+        Mirror domain_tags into PatternDomain rows.
+        
+        WHY: The API keeps the CSV string, but the database can only
+        index and count tags stored one per row. Syncing here catches
+        every writer (create, update, merge). Existing rows are reused
+        so re-saving the same tag is not a delete + insert.
+        """
+        existing = {d.domain: d for d in self.domains}
+        self.domains = [
+            existing.get(tag) or PatternDomain(domain=tag)
+            for tag in _split_tags(value)
+        ]
+        return value
+    
+    @classmethod
+    def has_domain(cls, tag: str):
+        """
+        SQL predicate: pattern is tagged with exactly `tag`.
+        
+        WHY: ILIKE '%tag%' matched substrings ("ai" hit "ai_ml") and
+        could not use an index. This is an EXISTS on the indexed
+        pattern_domains.domain column.
+        """
+        return cls.domains.any(PatternDomain.domain == tag.strip().lower())
+
+
+# WHY: Names are matched case-insensitively (lower(name) = lower(:v))
+# on every get_or_create during entry save. An expression index lets
+# those lookups use the index, and being unique it also stops
+# "Two Pointer" and "two pointer" from coexisting.
+Index("ix_patterns_name_lower", func.lower(Pattern.name), unique=True)
+
+
+class PatternDomain(Base):
+    """
+    One domain tag of a pattern.
+    
+    WHY separate table:
+    - domain_tags is a CSV string, which can't be indexed per tag
+    - "patterns tagged X" becomes an index lookup on domain
+    - "patterns spanning >1 domain" becomes a GROUP BY
+    
+    Rows are maintained by Pattern's domain_tags validator; never
+    write them directly.
+    """
+    __tablename__ = "pattern_domains"
+    __table_args__ = (
+        Index("ix_pattern_domains_domain_pattern_id", "domain", "pattern_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pattern_id = Column(
+        Integer, ForeignKey("patterns.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    domain = Column(String(100), nullable=False)
+    
+    pattern = relationship("Pattern", back_populates="domains")
+    
+    def __repr__(self):
+        return f"<PatternDomain(pattern_id={self.pattern_id}, domain='{self.domain}')>"
 
 
 class EntryPattern(Base):
@@ -75,9 +185,13 @@ class EntryPattern(Base):
     - Allow pattern strength per entry
     """
     __tablename__ = "entry_patterns"
+    __table_args__ = (
+        Index("ix_entry_patterns_pattern_id_was_successful", "pattern_id", "was_successful"),
+        Index("ix_entry_patterns_entry_id_pattern_id", "entry_id", "pattern_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False)
     pattern_id = Column(Integer, ForeignKey("patterns.id"), nullable=False)
     
     relevance_score = Column(Float, default=1.0)
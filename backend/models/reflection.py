@@ -14,11 +14,20 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, 
-    ForeignKey
+    ForeignKey, Index, text
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from database import Base
+from search_tokens import join_tokens
+
+
+BLOCKER_PREFIX_LENGTH = 50
+
+
+def blocker_prefix(initial_blocker: str) -> str:
+    """Normalized leading text used to group similar blockers."""
+    return initial_blocker.strip().lower()[:BLOCKER_PREFIX_LENGTH]
 
 
 class Reflection(Base):
@@ -50,16 +59,30 @@ class Reflection(Base):
       Track your insight speed over time.
     """
     __tablename__ = "reflections"
+    __table_args__ = (
+        # Partial: revision suggestions only ever ask for low confidence.
+        Index(
+            "ix_reflections_low_confidence",
+            "confidence_level", "entry_id",
+            sqlite_where=text("confidence_level <= 2"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False, unique=True)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     context = Column(Text, nullable=False)
     initial_blocker = Column(Text, nullable=False)
+    # Maintained by the initial_blocker validator; repeated-blocker
+    # warnings GROUP BY this indexed column.
+    initial_blocker_prefix = Column(String(BLOCKER_PREFIX_LENGTH), nullable=True, index=True)
     trigger_signal = Column(Text, nullable=False)
     key_pattern = Column(String(500), nullable=False, index=True)
     mistake_or_edge_case = Column(Text, nullable=False)
     
+    # Tokens of the fields recall matches on (SEARCH_FIELDS).
+    search_tokens = Column(Text, nullable=True)
+    
     time_to_insight_minutes = Column(Integer, nullable=True)
     
     additional_notes = Column(Text, nullable=True)
@@ -76,6 +99,21 @@ class Reflection(Base):
     def __repr__(self):
         return f"<Reflection(id={self.id}, pattern='{self.key_pattern}')>"
     
+    SEARCH_FIELDS = ("context", "key_pattern", "initial_blocker")
+    
+    @validates(*SEARCH_FIELDS)
+    def _sync_search_fields(self, key, value):
+        """
+        Keep search_tokens (and initial_blocker_prefix) in step with
+        the fields recall matches on.
+        """
+        fields = {name: getattr(self, name) for name in self.SEARCH_FIELDS}
+        fields[key] = value
+        self.search_tokens = join_tokens(*fields.values())
+        if key == "initial_blocker":
+            self.initial_blocker_prefix = blocker_prefix(value) if value else None
+        return value
+    
     def is_complete(self) -> bool:
         """
         Validate that all mandatory fields are filled.
@@ -16,9 +16,10 @@ from schemas.entry import (
     EntryWithReflection, EntryListResponse
 )
 from schemas.reflection import ReflectionCreate, ReflectionResponse
+from services.embedding_service import get_embedding_service
 from services.entry_service import EntryService
 from services.pattern_service import PatternService
-from services.recall_service import RecallService
+from services.recall_service import RecallService, invalidate_recall_cache
 
 router = APIRouter()
 
@@ -293,9 +294,13 @@ def update_reflection(
     reflection.additional_notes = reflection_data.additional_notes
     reflection.next_time_strategy = reflection_data.next_time_strategy
     reflection.confidence_level = reflection_data.confidence_level
+    embeddings = get_embedding_service()
+    embeddings.embed_entry(entry)
     
     db.commit()
+    embeddings.index_entry(entry)
     db.refresh(reflection)
+    invalidate_recall_cache()
     
     return reflection
 
@@ -5,16 +5,22 @@ WHY: Patterns are the reusable knowledge units.
 These endpoints support pattern CRUD and discovery.
 """
 
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import csv
+import io
+from typing import Iterator, Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import SessionLocal, get_db
+from models import EntryPattern
 from schemas.pattern import (
     PatternCreate, PatternUpdate, PatternResponse,
     PatternWithEntries
 )
-from services.pattern_service import PatternService
+from services.pattern_service import PatternService, invalidate_pattern_stats_cache
+from services.recall_service import invalidate_recall_cache
 
 router = APIRouter()
 
@@ -41,7 +47,8 @@ def create_pattern(
 
 @router.get("/", response_model=List[PatternResponse])
 def list_patterns(
-    page: int = Query(1, ge=1),
+    response: Response,
+    cursor: Optional[str] = None,
     page_size: int = Query(50, ge=1, le=100),
     domain: Optional[str] = None,
     search: Optional[str] = None,
@@ -53,20 +60,34 @@ def list_patterns(
     
     WHY: Browse your pattern vocabulary. Sort by usage
     to see which patterns appear most often.
+    
+    Pagination is cursor-based: pass the X-Next-Cursor header of
+    one response as `cursor` to get the next page. The header is
+    absent on the last page.
     """
     service = PatternService(db)
-    patterns, total = service.get_patterns(
-        page=page,
-        page_size=page_size,
-        domain_tag=domain,
-        search_query=search,
-        sort_by=sort_by,
-    )
+    
+    try:
+        patterns, next_cursor = service.get_patterns(
+            cursor=cursor,
+            page_size=page_size,
+            domain_tag=domain,
+            search_query=search,
+            sort_by=sort_by,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return patterns
 
 
 @router.get("/cross-domain", response_model=List[PatternResponse])
-def get_cross_domain_patterns(db: Session = Depends(get_db)):
+def get_cross_domain_patterns(
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
     """
     Get patterns that appear across multiple domains.
     
@@ -74,7 +95,7 @@ def get_cross_domain_patterns(db: Session = Depends(get_db)):
     "State compression" in DSA vs "Caching" in Backend - same idea!
     """
     service = PatternService(db)
-    return service.get_cross_domain_patterns()
+    return service.get_cross_domain_patterns(limit=limit)
 
 
 @router.get("/stats")
@@ -84,7 +105,51 @@ def get_pattern_stats(db: Session = Depends(get_db)):
     return service.get_pattern_stats()
 
 
-@router.get("/search")
+EXPORT_COLUMNS = (
+    "id", "name", "description", "domain_tags", "common_triggers",
+    "common_mistakes", "usage_count", "success_rate", "created_at",
+    "last_used_at",
+)
+
+
+def _export_rows() -> Iterator[str]:
+    """
+    Yield the pattern library as CSV, one chunk per row.
+    
+    WHY: Owns its session because the response body is produced
+    after the request's get_db dependency has already closed its own.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    db = SessionLocal()
+    try:
+        writer.writerow(EXPORT_COLUMNS)
+        for pattern in PatternService(db).iter_patterns():
+            writer.writerow(getattr(pattern, column) for column in EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def export_patterns():
+    """
+    Export every pattern as CSV.
+    
+    WHY: Backups and offline analysis. Rows are streamed from the
+    database, so large libraries are never held in memory at once.
+    """
+    return StreamingResponse(
+        _export_rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=patterns.csv"},
+    )
+
+
+@router.get("/search", response_model=List[PatternResponse])
 def search_patterns(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
@@ -97,7 +162,6 @@ def search_patterns(
     """
     service = PatternService(db)
     patterns, _ = service.get_patterns(
-        page=1,
         page_size=limit,
         search_query=q,
     )
@@ -188,15 +252,35 @@ def merge_patterns(
     if source.id == target.id:
         raise HTTPException(400, "Cannot merge pattern with itself")
     
-    from models import EntryPattern
-    associations = db.query(EntryPattern).filter(
-        EntryPattern.pattern_id == source.id
-    ).all()
-    
-    for assoc in associations:
-        assoc.pattern_id = target.id
+    # Bulk statements, so the source's links are never loaded into the
+    # session (deleting a Pattern with loaded links would null their
+    # pattern_id). Links the target already has are dropped, since
+    # (entry, pattern) is unique.
+    target_entry_ids = select(EntryPattern.entry_id).where(
+        EntryPattern.pattern_id == target.id
+    )
+    db.execute(
+        update(EntryPattern).where(
+            EntryPattern.pattern_id == source.id,
+            EntryPattern.entry_id.not_in(target_entry_ids),
+        ).values(pattern_id=target.id),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(
+        delete(EntryPattern).where(EntryPattern.pattern_id == source.id),
+        execution_options={"synchronize_session": False},
+    )
     
-    target.usage_count += source.usage_count
+    # Recount from the merged links rather than adding the source's
+    # counters, which included the duplicates just dropped.
+    target.usage_count, target.success_count = db.query(
+        func.count(EntryPattern.id),
+        func.count(EntryPattern.id).filter(EntryPattern.was_successful == 1),
+    ).filter(EntryPattern.pattern_id == target.id).one()
+    target.success_rate = (
+        target.success_count / target.usage_count
+        if target.usage_count else 0.0
+    )
     
     if source.domain_tags:
         source_tags = set(source.domain_tags.split(","))
@@ -206,6 +290,8 @@ def merge_patterns(
     
     db.delete(source)
     db.commit()
+    invalidate_pattern_stats_cache()
+    invalidate_recall_cache()
     
     return {
         "message": f"Merged '{source.name}' into '{target.name}'",
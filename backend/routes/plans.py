@@ -73,7 +73,7 @@ async def generate_plan(
         if request.target_ai_ml_level:
             target_levels["ai_ml"] = request.target_ai_ml_level
         
-        plan = service.generate_plan(
+        plan = await service.generate_plan(
             db=db,
             plan_type=request.plan_type,
             primary_goal=request.primary_goal,
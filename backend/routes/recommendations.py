@@ -6,8 +6,10 @@ These endpoints power the recommendation system - generating, viewing,
 and providing feedback on AI suggestions.
 """
 
-from typing import Optional, List
+import json
+from typing import AsyncIterator, Optional, List
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -27,7 +29,7 @@ from schemas.recommendation import (
     SkillGapAnalysis,
     RecommendationDashboard
 )
-from services.recommendation_service import get_recommendation_service
+from services.recommendation_service import get_recommendation_service, invalidate_recommendation_cache
 
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
@@ -54,7 +56,7 @@ async def generate_recommendations(
     try:
         domains = [d.value for d in request.domains] if request.domains else None
         
-        recommendations = service.generate_recommendations(
+        recommendations = await service.generate_recommendations(
             db=db,
             domains=domains,
             count=request.count,
@@ -92,7 +94,7 @@ async def get_quick_recommendation(
     service = get_recommendation_service()
     
     try:
-        result = service.get_quick_recommendation(
+        result = await service.get_quick_recommendation(
             db=db,
             available_minutes=minutes,
             domain=domain
@@ -102,6 +104,45 @@ async def get_quick_recommendation(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/quick/stream")
+async def stream_quick_recommendation(
+    minutes: int = 30,
+    domain: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the quick recommendation as server-sent events.
+    
+    WHY: Each event carries the recommendation parsed so far, so the
+    UI can show the title within the first few tokens instead of
+    waiting for the whole answer. A failure mid-stream is sent as an
+    "error" event, since the 200 status is already on the wire.
+    """
+    service = get_recommendation_service()
+    
+    try:
+        partials = service.stream_quick_recommendation(
+            db=db,
+            available_minutes=minutes,
+            domain=domain
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events() -> AsyncIterator[str]:
+        error = "Quick recommendation failed: no JSON in model reply"
+        try:
+            async for partial in partials:
+                error = None
+                yield f"data: {json.dumps(partial)}\n\n"
+        except Exception as e:
+            error = f"Quick recommendation failed: {str(e)}"
+        if error:
+            yield f"event: error\ndata: {json.dumps({'detail': error})}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.get("/skill-gaps", response_model=List[SkillGapAnalysis])
 async def analyze_skill_gaps(db: Session = Depends(get_db)):
     """
@@ -113,19 +154,19 @@ async def analyze_skill_gaps(db: Session = Depends(get_db)):
     service = get_recommendation_service()
     
     try:
-        gaps = service.analyze_skill_gaps(db)
+        gaps = await service.analyze_skill_gaps(db)
         return [SkillGapAnalysis(**g) for g in gaps]
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/dashboard", response_model=RecommendationDashboard)
-async def get_recommendation_dashboard(db: Session = Depends(get_db)):
-    """
-    Get dashboard data for recommendations section.
-    
-    Returns active recommendations from database (no AI calls).
-    """
+def _build_dashboard(
+    db: Session,
+    skill_gaps: Optional[List[dict]] = None,
+    daily_suggestion: Optional[dict] = None,
+    weekly_focus: Optional[str] = None
+) -> RecommendationDashboard:
+    """Active recommendations and stats from the database, plus any AI parts."""
     active_recs = db.query(Recommendation).filter(
         Recommendation.is_completed == False,
         Recommendation.is_dismissed == False
@@ -140,9 +181,9 @@ async def get_recommendation_dashboard(db: Session = Depends(get_db)):
     
     return RecommendationDashboard(
         active_recommendations=[RecommendationSummary.model_validate(r) for r in active_recs],
-        skill_gaps=[],
-        daily_suggestion=None,
-        weekly_focus=None,
+        skill_gaps=[SkillGapAnalysis(**g) for g in skill_gaps or []],
+        daily_suggestion=QuickRecommendation(**daily_suggestion) if daily_suggestion else None,
+        weekly_focus=weekly_focus,
         stats={
             "total": total,
             "completed": completed,
@@ -152,6 +193,53 @@ async def get_recommendation_dashboard(db: Session = Depends(get_db)):
     )
 
 
+@router.get("/dashboard", response_model=RecommendationDashboard)
+async def get_recommendation_dashboard(db: Session = Depends(get_db)):
+    """
+    Get dashboard data for recommendations section.
+    
+    Returns active recommendations from database (no AI calls).
+    """
+    return _build_dashboard(db)
+
+
+@router.post("/dashboard/generate", response_model=RecommendationDashboard)
+async def generate_recommendation_dashboard(
+    request: GenerateRecommendationsRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate recommendations, a quick pick and skill gaps in one AI call.
+    
+    WHY: Filling the whole dashboard through /generate, /quick and
+    /skill-gaps costs three Gemini calls sending the same profile.
+    The new recommendations are saved and appear among the active ones.
+    """
+    service = get_recommendation_service()
+    
+    try:
+        domains = [d.value for d in request.domains] if request.domains else None
+        
+        bundle = await service.generate_all(
+            db=db,
+            domains=domains,
+            count=request.count,
+            current_focus=request.current_focus,
+            difficulty_preference=request.difficulty_preference,
+            available_minutes=request.available_time_minutes or 30
+        )
+        
+        return _build_dashboard(
+            db,
+            skill_gaps=bundle["skill_gaps"],
+            daily_suggestion=bundle["quick_recommendation"],
+            weekly_focus=bundle["weekly_focus"]
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=RecommendationsListResponse)
 async def list_recommendations(
     domain: Optional[RecommendationDomain] = None,
@@ -236,6 +324,7 @@ async def update_recommendation(
         rec.is_dismissed = update.is_dismissed
     
     db.commit()
+    invalidate_recommendation_cache()
     db.refresh(rec)
     return rec
 
@@ -260,6 +349,7 @@ async def submit_feedback(
     rec.user_feedback = feedback.user_feedback
     
     db.commit()
+    invalidate_recommendation_cache()
     db.refresh(rec)
     return rec
 
@@ -276,4 +366,5 @@ async def delete_recommendation(
     
     db.delete(rec)
     db.commit()
+    invalidate_recommendation_cache()
     return {"message": "Recommendation deleted"}
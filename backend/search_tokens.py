@@ -0,0 +1,38 @@
+"""
+Search tokenization shared by models and recall.
+
+WHY: Recall compares query words against entry titles, reflections and
+pattern names. Tokenizing those once, when they are written, means a
+recall request only splits a stored string instead of lowercasing,
+regex-matching and stop-word filtering every candidate again.
+"""
+
+import re
+from typing import FrozenSet, Optional
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'is', 'are',
+})
+
+# Letters and digits, split on punctuation like SQLite's FTS5 tokenizer,
+# so "binary-search" and "binary search" match the same entries.
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(*texts: Optional[str]) -> FrozenSet[str]:
+    """Lowercase word tokens of the given texts, minus stop words."""
+    words = set()
+    for text in texts:
+        if text:
+            words.update(TOKEN_RE.findall(text.lower()))
+    return frozenset(words - STOP_WORDS)
+
+
+def join_tokens(*texts: Optional[str]) -> str:
+    """tokenize() as the space-separated string stored on models."""
+    return " ".join(sorted(tokenize(*texts)))
+
+
+def split_tokens(stored: Optional[str]) -> FrozenSet[str]:
+    """Inverse of join_tokens."""
+    return frozenset(stored.split()) if stored else frozenset()
@@ -12,6 +12,7 @@ from services.pattern_service import PatternService
 from services.recall_service import RecallService
 from services.analytics_service import AnalyticsService
 from services.ai_service import AIService, get_ai_service
+from services.embedding_service import EmbeddingService, get_embedding_service
 
 __all__ = [
     "EntryService",
@@ -20,4 +21,6 @@ __all__ = [
     "AnalyticsService",
     "AIService",
     "get_ai_service",
+    "EmbeddingService",
+    "get_embedding_service",
 ]
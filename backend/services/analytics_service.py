@@ -9,16 +9,33 @@ This service provides:
 - Revision management
 """
 
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from sqlalchemy import desc, func, and_, select, literal, union_all
 
+from cache import cache
+from config import settings
 from models import (
     Entry, Pattern, Reflection, EntryPattern,
     BlockerAnalytics, RevisionHistory, DailyStats
 )
 from models.entry import EntryType
+from services.recall_service import invalidate_recall_cache
+
+
+INSIGHTS_CACHE_PREFIX = "insights:"
+
+
+def invalidate_insights_cache():
+    """
+    Drop cached progress insights.
+    
+    WHY: Called by writers that change entry counts or completion,
+    so the dashboard doesn't show stale numbers until the TTL expires.
+    """
+    cache.invalidate(INSIGHTS_CACHE_PREFIX)
 
 
 class AnalyticsService:
@@ -65,12 +82,15 @@ class AnalyticsService:
         self.db.add(revision)
         
         if entry_id and confidence_after:
-            entry = self.db.query(Entry).filter(Entry.id == entry_id).first()
-            if entry and entry.reflection:
-                entry.reflection.confidence_level = confidence_after
+            self.db.query(Reflection).filter(
+                Reflection.entry_id == entry_id
+            ).update(
+                {"confidence_level": confidence_after},
+                synchronize_session="evaluate",
+            )
         
         self.db.commit()
-        self.db.refresh(revision)
+        invalidate_recall_cache()
         
         return revision
     
@@ -167,12 +187,12 @@ class AnalyticsService:
         total_entries = sum(d["entries_total"] for d in daily_stats)
         total_time = sum(d["total_time_minutes"] for d in daily_stats)
         
-        domain_totals = {}
+        domain_totals = Counter()
         for stats in daily_stats:
-            for domain, count in stats["entries_by_type"].items():
-                domain_totals[domain] = domain_totals.get(domain, 0) + count
+            domain_totals.update(stats["entries_by_type"])
         
-        most_active_domain = max(domain_totals.items(), key=lambda x: x[1])[0] if domain_totals else None
+        most_active = domain_totals.most_common(1)
+        most_active_domain = most_active[0][0] if most_active else None
         
         return {
             "period": f"{start_date.date()} to {end_date.date()}",
@@ -180,7 +200,7 @@ class AnalyticsService:
             "total_time_minutes": total_time,
             "most_active_domain": most_active_domain,
             "daily_breakdown": daily_stats,
-            "domains_breakdown": domain_totals,
+            "domains_breakdown": dict(domain_totals),
         }
     
     def get_progress_insights(self) -> List[Dict]:
@@ -188,7 +208,20 @@ class AnalyticsService:
         Generate insights about learning progress.
         
         WHY: High-level insights help guide focus.
+        Insights move at daily granularity but are requested on every
+        dashboard view, so results are cached per day for a short TTL.
         """
+        cache_key = f"{INSIGHTS_CACHE_PREFIX}{datetime.utcnow().date()}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        insights = self._build_progress_insights()
+        cache.set(cache_key, insights, settings.INSIGHTS_CACHE_TTL_SECONDS)
+        return insights
+    
+    def _build_progress_insights(self) -> List[Dict]:
+        """Compute progress insights from the database."""
         insights = []
         
         streak = self._calculate_streak()
@@ -200,13 +233,19 @@ class AnalyticsService:
                 "priority": 1,
             })
         
-        domain_counts = {}
-        for entry_type in EntryType:
-            count = self.db.query(func.count(Entry.id)).filter(
-                Entry.entry_type == entry_type,
-                Entry.is_complete == True,
-            ).scalar()
-            domain_counts[entry_type.value] = count
+        type_counts = self.db.query(
+            Entry.entry_type,
+            func.count(Entry.id),
+            func.count(Entry.id).filter(Entry.is_complete == True),
+        ).group_by(Entry.entry_type).all()
+        
+        domain_counts = {entry_type.value: 0 for entry_type in EntryType}
+        total_entries = 0
+        complete_entries = 0
+        for entry_type, count, complete_count in type_counts:
+            domain_counts[entry_type.value] = complete_count
+            total_entries += count
+            complete_entries += complete_count
         
         total = sum(domain_counts.values())
         if total > 0:
@@ -221,13 +260,29 @@ class AnalyticsService:
                     "priority": 2,
                 })
         
-        high_success_patterns = self.db.query(Pattern).filter(
+        high_success = select(
+            literal("high").label("bucket"), Pattern.name
+        ).where(
             Pattern.usage_count >= 5,
             Pattern.success_rate >= 0.8,
+        ).order_by(desc(Pattern.success_rate)).limit(3).subquery()
+        
+        low_success = select(
+            literal("low").label("bucket"), Pattern.name
+        ).where(
+            Pattern.usage_count >= 3,
+            Pattern.success_rate < 0.5,
+        ).order_by(Pattern.success_rate).limit(3).subquery()
+        
+        pattern_rows = self.db.execute(
+            union_all(select(high_success), select(low_success))
         ).all()
         
-        if high_success_patterns:
-            pattern_names = ", ".join(p.name for p in high_success_patterns[:3])
+        high_success_names = [name for bucket, name in pattern_rows if bucket == "high"]
+        low_success_names = [name for bucket, name in pattern_rows if bucket == "low"]
+        
+        if high_success_names:
+            pattern_names = ", ".join(high_success_names)
             insights.append({
                 "type": "strength",
                 "title": "💪 Mastered patterns",
@@ -235,13 +290,8 @@ class AnalyticsService:
                 "priority": 2,
             })
         
-        low_success_patterns = self.db.query(Pattern).filter(
-            Pattern.usage_count >= 3,
-            Pattern.success_rate < 0.5,
-        ).order_by(Pattern.success_rate).limit(3).all()
-        
-        if low_success_patterns:
-            pattern_names = ", ".join(p.name for p in low_success_patterns)
+        if low_success_names:
+            pattern_names = ", ".join(low_success_names)
             insights.append({
                 "type": "weakness",
                 "title": "📈 Improvement areas",
@@ -249,11 +299,6 @@ class AnalyticsService:
                 "priority": 1,
             })
         
-        total_entries = self.db.query(func.count(Entry.id)).scalar()
-        complete_entries = self.db.query(func.count(Entry.id)).filter(
-            Entry.is_complete == True
-        ).scalar()
-        
         if total_entries > 0:
             completion_rate = complete_entries / total_entries
             if completion_rate < 0.8:
@@ -276,11 +321,13 @@ class AnalyticsService:
             start = datetime.combine(current_date, datetime.min.time())
             end = start + timedelta(days=1)
             
-            has_entry = self.db.query(Entry).filter(
-                Entry.created_at >= start,
-                Entry.created_at < end,
-                Entry.is_complete == True,
-            ).first()
+            has_entry = self.db.query(
+                self.db.query(Entry.id).filter(
+                    Entry.is_complete == True,
+                    Entry.created_at >= start,
+                    Entry.created_at < end,
+                ).exists()
+            ).scalar()
             
             if has_entry:
                 streak += 1
@@ -297,24 +344,33 @@ class AnalyticsService:
         WHY: Understanding systematic blockers enables
         targeted improvement.
         """
-        blockers = self.db.query(BlockerAnalytics).order_by(
+        total, flagged = self.db.query(
+            func.count(BlockerAnalytics.id),
+            func.count(BlockerAnalytics.id).filter(BlockerAnalytics.is_flagged == True),
+        ).one()
+
+        top_blockers = self.db.query(
+            func.substr(BlockerAnalytics.blocker_text, 1, 100),
+            BlockerAnalytics.occurrence_count,
+            BlockerAnalytics.is_flagged,
+            BlockerAnalytics.first_seen_at,
+            BlockerAnalytics.last_seen_at,
+        ).order_by(
             desc(BlockerAnalytics.occurrence_count)
-        ).all()
-        
-        flagged = [b for b in blockers if b.is_flagged]
-        
+        ).limit(10).all()
+
         return {
-            "total_unique_blockers": len(blockers),
-            "flagged_blockers": len(flagged),
+            "total_unique_blockers": total,
+            "flagged_blockers": flagged,
             "top_blockers": [
                 {
-                    "text": b.blocker_text[:100],
-                    "count": b.occurrence_count,
-                    "is_flagged": b.is_flagged,
-                    "first_seen": b.first_seen_at.isoformat(),
-                    "last_seen": b.last_seen_at.isoformat(),
+                    "text": text,
+                    "count": count,
+                    "is_flagged": is_flagged,
+                    "first_seen": first_seen.isoformat(),
+                    "last_seen": last_seen.isoformat(),
                 }
-                for b in blockers[:10]
+                for text, count, is_flagged, first_seen, last_seen in top_blockers
             ],
         }
     
@@ -330,6 +386,27 @@ class AnalyticsService:
             RevisionHistory.next_review_at <= now
         ).order_by(RevisionHistory.next_review_at).all()
         
+        entry_ids = {item.entry_id for item in due_items if item.entry_id}
+        pattern_ids = {item.pattern_id for item in due_items if item.pattern_id}
+        
+        entries = {}
+        if entry_ids:
+            entries = {
+                row.id: row
+                for row in self.db.query(
+                    Entry.id, Entry.title, Reflection.key_pattern
+                ).outerjoin(Reflection).filter(Entry.id.in_(entry_ids))
+            }
+        
+        patterns = {}
+        if pattern_ids:
+            patterns = {
+                row.id: row
+                for row in self.db.query(
+                    Pattern.id, Pattern.name, Pattern.description
+                ).filter(Pattern.id.in_(pattern_ids))
+            }
+        
         queue = []
         seen_entries = set()
         seen_patterns = set()
@@ -342,20 +419,20 @@ class AnalyticsService:
             
             if item.entry_id:
                 seen_entries.add(item.entry_id)
-                entry = self.db.query(Entry).filter(Entry.id == item.entry_id).first()
+                entry = entries.get(item.entry_id)
                 if entry:
                     queue.append({
                         "type": "entry",
                         "id": entry.id,
                         "title": entry.title,
-                        "key_pattern": entry.reflection.key_pattern if entry.reflection else None,
+                        "key_pattern": entry.key_pattern,
                         "last_recall_quality": item.recall_quality,
                         "due_since": (now - item.next_review_at).days,
                     })
             
             if item.pattern_id:
                 seen_patterns.add(item.pattern_id)
-                pattern = self.db.query(Pattern).filter(Pattern.id == item.pattern_id).first()
+                pattern = patterns.get(item.pattern_id)
                 if pattern:
                     queue.append({
                         "type": "pattern",
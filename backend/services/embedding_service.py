@@ -0,0 +1,210 @@
+"""
+Embedding service - semantic vectors for recall.
+
+WHY: Keyword overlap misses "two pointers" vs "sliding window over
+sorted input". Entries are embedded once, when their text changes,
+and recall becomes one query embedding plus one vector search.
+
+OPTIONAL: Needs sentence-transformers, faiss and numpy installed and
+EMBEDDING_MODEL set (e.g. "BAAI/bge-small-en-v1.5"). Without them
+`available` is False and recall keeps using keyword search.
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Entry
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    faiss = np = SentenceTransformer = None
+
+
+def entry_text(entry: Entry) -> str:
+    """The text an entry is embedded from: title plus reflection."""
+    parts = [entry.title]
+    if entry.reflection:
+        parts += [
+            entry.reflection.context,
+            entry.reflection.key_pattern,
+            entry.reflection.initial_blocker,
+        ]
+    return "\n".join(p for p in parts if p)
+
+
+def _quantize(vector: "np.ndarray") -> "np.ndarray":
+    """Map a unit-length float vector onto int8."""
+    return np.clip(np.rint(vector * 127), -127, 127).astype(np.int8)
+
+
+def decode(embedding: bytes) -> "np.ndarray":
+    """Inverse of the int8 storage format, as float32."""
+    return np.frombuffer(embedding, dtype=np.int8).astype(np.float32) / 127
+
+
+def mmr(relevance: List[float], embeddings: List[bytes], k: int, lambda_: float) -> List[int]:
+    """
+    Maximal Marginal Relevance: pick k indices balancing relevance and novelty.
+
+    WHY: The nearest neighbours of a query are often near-copies of each
+    other (the same blocker logged three times). Each pick maximizes
+    lambda * relevance - (1 - lambda) * max similarity to earlier picks.
+    Run on the few dozen candidates of a search, so the pairwise
+    similarity matrix is tiny.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    vectors = np.vstack([decode(e) for e in embeddings])
+    pairwise = vectors @ vectors.T
+    selected: List[int] = []
+    redundancy = np.zeros(len(relevance), dtype=np.float32)
+    remaining = np.ones(len(relevance), dtype=bool)
+    for _ in range(min(k, len(relevance))):
+        marginal = lambda_ * relevance - (1 - lambda_) * redundancy
+        best = int(np.argmax(np.where(remaining, marginal, -np.inf)))
+        selected.append(best)
+        remaining[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+class EmbeddingService:
+    """
+    Embeds entries and searches them by cosine similarity.
+
+    WHY: Vectors are stored on Entry.embedding as int8 bytes, so they
+    are computed once per write, never per query. The search index is
+    built from those bytes on first use and kept current by
+    index_entry/remove_entry, so it lives for the whole process.
+
+    Vectors are unit length, so every component is in [-1, 1] and maps
+    onto int8 as round(x * 127): a quarter of fp32's size, and the
+    index keeps them as 8-bit codes too.
+    """
+
+    def __init__(self):
+        if settings.EMBEDDING_MODEL and SentenceTransformer is not None:
+            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            self.dim = self.model.get_sentence_embedding_dimension()
+        else:
+            self.model = None
+            self.dim = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def embed(self, text: str) -> "np.ndarray":
+        """Unit-length float32 vector, so inner product is cosine similarity."""
+        return self.model.encode(
+            [text], normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+    def embed_entry(self, entry: Entry) -> None:
+        """
+        Compute and store an entry's embedding.
+
+        Call before committing any change to the entry's title or
+        reflection, then index_entry once the commit has succeeded.
+        """
+        if not self.available:
+            return
+        entry.embedding = _quantize(self.embed(entry_text(entry))).tobytes()
+
+    def index_entry(self, entry: Entry) -> None:
+        """
+        Put a committed entry's stored embedding into the index.
+
+        WHY after the commit: a rolled-back write would otherwise leave
+        the index holding a vector the database never saved.
+        """
+        if not self.available or entry.embedding is None:
+            return
+        self._update_index(entry.id, decode(entry.embedding).reshape(1, -1))
+
+    def remove_entry(self, entry_id: int) -> None:
+        """Drop a deleted entry from the index."""
+        with self._lock:
+            if self._index is not None:
+                self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+
+    def search(self, db: Session, text: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        Return up to `limit` (entry_id, cosine similarity) pairs, best first.
+        """
+        query = self.embed(text)
+        with self._lock:
+            index = self._load_index(db)
+            if index.ntotal == 0:
+                return []
+            scores, ids = index.search(query, min(limit, index.ntotal))
+        return [
+            (int(entry_id), float(score))
+            for entry_id, score in zip(ids[0], scores[0])
+            if entry_id != -1
+        ]
+
+    def _update_index(self, entry_id: int, vector: "np.ndarray") -> None:
+        with self._lock:
+            if self._index is None:
+                return  # Built from the DB on first search.
+            ids = np.array([entry_id], dtype=np.int64)
+            self._index.remove_ids(ids)
+            self._index.add_with_ids(vector, ids)
+
+    def _load_index(self, db: Session):
+        """Build the index from stored vectors. Caller holds the lock."""
+        if self._index is not None:
+            return self._index
+
+        # Flat inner-product scan over 8-bit codes: a personal corpus is
+        # small enough that this beats HNSW build time, and IDMap2
+        # supports replacing a vector when its entry is edited. Training
+        # on the two corners fixes the quantizer range to [-1, 1].
+        quantizer = faiss.IndexScalarQuantizer(
+            self.dim, faiss.ScalarQuantizer.QT_8bit_uniform, faiss.METRIC_INNER_PRODUCT
+        )
+        quantizer.train(np.array([[-1.0] * self.dim, [1.0] * self.dim], dtype=np.float32))
+        index = faiss.IndexIDMap2(quantizer)
+
+        # Vectors of another length came from a different model or
+        # format; those entries are re-embedded on their next write.
+        rows = [
+            (entry_id, embedding)
+            for entry_id, embedding in db.query(Entry.id, Entry.embedding).filter(
+                Entry.embedding.isnot(None)
+            )
+            if len(embedding) == self.dim
+        ]
+        if rows:
+            vectors = decode(b"".join(e for _, e in rows)).reshape(len(rows), self.dim)
+            index.add_with_ids(vectors, np.array([entry_id for entry_id, _ in rows], dtype=np.int64))
+        self._index = index
+        return index
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get or create the embedding service singleton.
+
+    WHY the lock: Sync routes run in a threadpool, so concurrent first
+    requests could each load the SentenceTransformer model. The
+    unlocked check keeps every later call lock-free.
+    """
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
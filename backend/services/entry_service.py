@@ -10,11 +10,16 @@ data integrity and business rules.
 
 from datetime import datetime
 from typing import List, Optional, Tuple
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import delete, desc, func
 
-from models import Entry, EntryType, Reflection, EntryPattern, Pattern
+from models import (
+    Entry, EntryType, Reflection, EntryPattern, Pattern, RevisionHistory, blocker_entries,
+)
 from schemas.entry import EntryCreate, EntryUpdate
+from services.analytics_service import invalidate_insights_cache
+from services.embedding_service import get_embedding_service
+from services.recall_service import invalidate_recall_cache
 
 
 class EntryService:
@@ -60,16 +65,22 @@ class EntryService:
         
         self.db.add(entry)
         self.db.commit()
-        self.db.refresh(entry)
+        invalidate_insights_cache()
         
         return entry
     
     def get_entry(self, entry_id: int) -> Optional[Entry]:
-        """Get entry by ID with all relationships loaded."""
+        """
+        Get entry by ID with all relationships loaded.
+        
+        WHY: populate_existing() makes this a fresh read even when the
+        entry is already in the session, since sessions don't expire
+        objects on commit and pattern links are often added by id.
+        """
         return self.db.query(Entry).options(
             joinedload(Entry.reflection),
-            joinedload(Entry.patterns).joinedload(EntryPattern.pattern)
-        ).filter(Entry.id == entry_id).first()
+            selectinload(Entry.patterns).joinedload(EntryPattern.pattern)
+        ).filter(Entry.id == entry_id).populate_existing().first()
     
     def get_entries(
         self,
@@ -125,9 +136,15 @@ class EntryService:
         for field, value in update_data.items():
             setattr(entry, field, value)
         
+        embeddings = get_embedding_service()
+        if "title" in update_data:
+            embeddings.embed_entry(entry)
+        
         entry.updated_at = datetime.utcnow()
         self.db.commit()
-        self.db.refresh(entry)
+        if "title" in update_data:
+            embeddings.index_entry(entry)
+        invalidate_recall_cache()
         
         return entry
     
@@ -135,15 +152,23 @@ class EntryService:
         """
         Delete an entry and all related data.
         
-        WHY: Cascade delete handles reflection and patterns.
+        WHY: Bulk DELETEs, so nothing is loaded into the session. The
+        child rows go first, in the same transaction: databases created
+        before the foreign keys were ON DELETE CASCADE keep their old
+        constraints, which would reject deleting the entry itself.
         """
-        entry = self.db.query(Entry).filter(Entry.id == entry_id).first()
+        for child in (Reflection, EntryPattern, RevisionHistory):
+            self.db.execute(delete(child).where(child.entry_id == entry_id))
+        self.db.execute(delete(blocker_entries).where(blocker_entries.c.entry_id == entry_id))
+        result = self.db.execute(delete(Entry).where(Entry.id == entry_id))
+        self.db.commit()
         
-        if not entry:
+        if result.rowcount == 0:
             return False
         
-        self.db.delete(entry)
-        self.db.commit()
+        get_embedding_service().remove_entry(entry_id)
+        invalidate_insights_cache()
+        invalidate_recall_cache()
         
         return True
     
@@ -173,9 +198,13 @@ class EntryService:
         entry.has_reflection = True
         entry.is_complete = True
         entry.updated_at = datetime.utcnow()
+        embeddings = get_embedding_service()
+        embeddings.embed_entry(entry)
         
         self.db.commit()
-        self.db.refresh(entry)
+        embeddings.index_entry(entry)
+        invalidate_insights_cache()
+        invalidate_recall_cache()
         
         return entry
     
@@ -228,7 +257,8 @@ class EntryService:
         Future: Replace with embedding-based semantic search.
         """
         db_query = self.db.query(Entry).options(
-            joinedload(Entry.reflection)
+            joinedload(Entry.reflection),
+            selectinload(Entry.patterns).joinedload(EntryPattern.pattern)
         )
         
         db_query = db_query.filter(
@@ -249,17 +279,19 @@ class EntryService:
         
         WHY: Dashboard overview of learning activity.
         """
-        total = self.db.query(func.count(Entry.id)).scalar()
-        complete = self.db.query(func.count(Entry.id)).filter(
-            Entry.is_complete == True
-        ).scalar()
-        
-        by_type = {}
-        for entry_type in EntryType:
-            count = self.db.query(func.count(Entry.id)).filter(
-                Entry.entry_type == entry_type
-            ).scalar()
+        type_counts = self.db.query(
+            Entry.entry_type,
+            func.count(Entry.id),
+            func.count(Entry.id).filter(Entry.is_complete == True),
+        ).group_by(Entry.entry_type).all()
+        
+        by_type = {entry_type.value: 0 for entry_type in EntryType}
+        total = 0
+        complete = 0
+        for entry_type, count, complete_count in type_counts:
             by_type[entry_type.value] = count
+            total += count
+            complete += complete_count
         
         avg_time = self.db.query(func.avg(Entry.time_spent_minutes)).filter(
             Entry.time_spent_minutes.isnot(None)
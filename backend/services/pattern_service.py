@@ -6,13 +6,55 @@ This service manages pattern lifecycle, discovery,
 and association with entries.
 """
 
+import base64
+import json
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, func
+from sqlalchemy import Float, case, cast, desc, exists, func, literal, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 
-from models import Pattern, EntryPattern, Entry
+from cache import cache
+from config import settings
+from database import db_now
+from models import Pattern, EntryPattern, Entry, PatternDomain
 from schemas.pattern import PatternCreate, PatternUpdate
+from search_tokens import join_tokens
+from services.recall_service import invalidate_recall_cache
+
+
+PATTERN_STATS_CACHE_KEY = "patterns:stats"
+
+
+def invalidate_pattern_stats_cache():
+    """
+    Drop cached pattern statistics.
+    
+    WHY: Called after every pattern write so the stats endpoint
+    never serves counts older than the last change.
+    """
+    cache.invalidate(PATTERN_STATS_CACHE_KEY)
+
+
+def _encode_cursor(sort_value: Any, pattern_id: int) -> str:
+    """Serialize the last (sort value, id) of a page into an opaque cursor."""
+    raw = json.dumps([sort_value, pattern_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, parse_value: Callable[[Any], Any]) -> Tuple[Any, int]:
+    """
+    Inverse of _encode_cursor. Raises ValueError on garbage input.
+    
+    parse_value converts the decoded sort value back to the sort
+    column's type, so a wrongly typed value is rejected here too.
+    """
+    try:
+        sort_value, pattern_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return parse_value(sort_value), int(pattern_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
 
 
 class PatternService:
@@ -36,13 +78,6 @@ class PatternService:
         WHY: Patterns are user-defined, not textbook.
         This preserves personal vocabulary.
         """
-        existing = self.db.query(Pattern).filter(
-            func.lower(Pattern.name) == pattern_data.name.lower()
-        ).first()
-        
-        if existing:
-            raise ValueError(f"Pattern '{pattern_data.name}' already exists")
-        
         pattern = Pattern(
             name=pattern_data.name,
             description=pattern_data.description,
@@ -50,13 +85,21 @@ class PatternService:
             common_triggers=pattern_data.common_triggers,
             common_mistakes=pattern_data.common_mistakes,
             usage_count=0,
+            success_count=0,
             success_rate=0.0,
         )
         
+        # The unique index on lower(name) rejects duplicates, so there
+        # is no need for a separate "does it exist?" query first.
         self.db.add(pattern)
-        self.db.commit()
-        self.db.refresh(pattern)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError(f"Pattern '{pattern_data.name}' already exists")
         
+        invalidate_pattern_stats_cache()
+        invalidate_recall_cache()
         return pattern
     
     def get_pattern(self, pattern_id: int) -> Optional[Pattern]:
@@ -71,21 +114,31 @@ class PatternService:
     
     def get_patterns(
         self,
-        page: int = 1,
+        cursor: Optional[str] = None,
         page_size: int = 50,
         domain_tag: Optional[str] = None,
         search_query: Optional[str] = None,
         sort_by: str = "usage_count",  # usage_count, name, created_at
-    ) -> Tuple[List[Pattern], int]:
+    ) -> Tuple[List[Pattern], Optional[str]]:
         """
-        Get paginated list of patterns.
+        Get a page of patterns using keyset pagination.
         
         WHY: Supports pattern browsing and discovery.
+        OFFSET makes the database walk and discard every skipped row,
+        and the COUNT(*) for the total was a second scan. Seeking past
+        the last (sort key, id) of the previous page stays cheap on deep
+        pages, and fetching one extra row tells us if there is a next page.
+        
+        Returns:
+            (patterns, next_cursor) - next_cursor is None on the last page.
+        
+        Raises:
+            ValueError: If the cursor is malformed.
         """
         query = self.db.query(Pattern)
         
         if domain_tag:
-            query = query.filter(Pattern.domain_tags.ilike(f"%{domain_tag}%"))
+            query = query.filter(Pattern.has_domain(domain_tag))
         
         if search_query:
             query = query.filter(
@@ -93,18 +146,47 @@ class PatternService:
                 (Pattern.description.ilike(f"%{search_query}%"))
             )
         
-        total = query.count()
-        
         if sort_by == "usage_count":
-            query = query.order_by(desc(Pattern.usage_count))
+            sort_column, descending, parse_value = Pattern.usage_count, True, int
         elif sort_by == "name":
-            query = query.order_by(Pattern.name)
+            sort_column, descending, parse_value = Pattern.name, False, str
         else:
-            query = query.order_by(desc(Pattern.created_at))
+            sort_column, descending, parse_value = Pattern.created_at, True, datetime.fromisoformat
         
-        patterns = query.offset((page - 1) * page_size).limit(page_size).all()
+        if cursor:
+            last_value, last_id = _decode_cursor(cursor, parse_value)
+            key = tuple_(sort_column, Pattern.id)
+            query = query.filter(
+                key < (last_value, last_id) if descending else key > (last_value, last_id)
+            )
+        
+        if descending:
+            query = query.order_by(desc(sort_column), desc(Pattern.id))
+        else:
+            query = query.order_by(sort_column, Pattern.id)
         
-        return patterns, total
+        patterns = query.limit(page_size + 1).all()
+        
+        next_cursor = None
+        if len(patterns) > page_size:
+            patterns = patterns[:page_size]
+            last = patterns[-1]
+            last_value = getattr(last, sort_column.key)
+            if isinstance(last_value, datetime):
+                last_value = last_value.isoformat()
+            next_cursor = _encode_cursor(last_value, last.id)
+        
+        return patterns, next_cursor
+    
+    def iter_patterns(self, chunk_size: int = 1000) -> Iterator[Pattern]:
+        """
+        Iterate over every pattern, in id order.
+        
+        WHY: Exports need the whole library. get_patterns buffers a
+        page in memory; this streams rows from the cursor chunk_size
+        at a time, so memory stays flat however many patterns exist.
+        """
+        yield from self.db.query(Pattern).order_by(Pattern.id).yield_per(chunk_size)
     
     def update_pattern(
         self, 
@@ -130,9 +212,10 @@ class PatternService:
         for field, value in update_data.items():
             setattr(pattern, field, value)
         
-        pattern.updated_at = datetime.utcnow()
+        # updated_at is stamped by the database (onupdate=db_now()).
         self.db.commit()
-        self.db.refresh(pattern)
+        invalidate_pattern_stats_cache()
+        invalidate_recall_cache()
         
         return pattern
     
@@ -145,6 +228,8 @@ class PatternService:
         
         self.db.delete(pattern)
         self.db.commit()
+        invalidate_pattern_stats_cache()
+        invalidate_recall_cache()
         
         return True
     
@@ -161,57 +246,73 @@ class PatternService:
         
         WHY: One entry can demonstrate multiple patterns.
         This builds the knowledge graph.
+        
+        Success counters on Pattern are maintained incrementally, so
+        recording an outcome never rescans the pattern's associations.
+        This runs on every reflection save, so it is two statements:
+        one UPDATE of the pattern counters and one upsert of the
+        association, with no SELECTs beforehand.
         """
-        existing = self.db.query(EntryPattern).filter(
-            EntryPattern.entry_id == entry_id,
-            EntryPattern.pattern_id == pattern_id
-        ).first()
+        match = (
+            (EntryPattern.entry_id == entry_id) &
+            (EntryPattern.pattern_id == pattern_id)
+        )
+        is_new = case((exists().where(match), 0), else_=1)
+        was_successful_before = case(
+            (select(EntryPattern.was_successful).where(match).scalar_subquery() == 1, 1),
+            else_=0,
+        )
+        usage_count = Pattern.usage_count + is_new
+        success_count = Pattern.success_count + int(was_successful == 1) - was_successful_before
+        
+        # Counters first: the subqueries must see the association as it
+        # was before the upsert below. SET expressions all read the old
+        # row, so the rate is built from the same expressions.
+        counters = update(Pattern).where(Pattern.id == pattern_id).values(
+            usage_count=usage_count,
+            success_count=success_count,
+            success_rate=case(
+                (usage_count > 0, cast(success_count, Float) / usage_count),
+                else_=0.0,
+            ),
+            last_used_at=case(
+                (is_new == 1, db_now()),
+                else_=Pattern.last_used_at,
+            ),
+        )
+        self.db.execute(counters, execution_options={"synchronize_session": False})
         
-        if existing:
-            existing.relevance_score = relevance_score
-            existing.application_notes = application_notes
-            existing.was_successful = was_successful
-            self.db.commit()
-            return existing
+        # A Pattern already loaded in this session (e.g. by the route's
+        # 404 check) is now stale; expire it so it reloads on next access.
+        loaded = self.db.identity_map.get(self.db.identity_key(Pattern, pattern_id))
+        if loaded is not None:
+            self.db.expire(loaded)
         
-        entry_pattern = EntryPattern(
+        stmt = sqlite_insert(EntryPattern).values(
             entry_id=entry_id,
             pattern_id=pattern_id,
             relevance_score=relevance_score,
             application_notes=application_notes,
             was_successful=was_successful,
         )
-        
-        self.db.add(entry_pattern)
-        
-        pattern = self.db.query(Pattern).filter(Pattern.id == pattern_id).first()
-        if pattern:
-            pattern.usage_count += 1
-            pattern.last_used_at = datetime.utcnow()
-            self._update_success_rate(pattern)
-        
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EntryPattern.entry_id, EntryPattern.pattern_id],
+            set_={
+                "relevance_score": stmt.excluded.relevance_score,
+                "application_notes": stmt.excluded.application_notes,
+                "was_successful": stmt.excluded.was_successful,
+            },
+        ).returning(EntryPattern)
+        
+        entry_pattern = self.db.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one()
         self.db.commit()
-        self.db.refresh(entry_pattern)
+        invalidate_pattern_stats_cache()
+        invalidate_recall_cache()
         
         return entry_pattern
     
-    def _update_success_rate(self, pattern: Pattern):
-        """
-        Recalculate pattern success rate.
-        
-        WHY: Track how often applying this pattern leads to success.
-        """
-        associations = self.db.query(EntryPattern).filter(
-            EntryPattern.pattern_id == pattern.id
-        ).all()
-        
-        if not associations:
-            pattern.success_rate = 0.0
-            return
-        
-        successful = sum(1 for a in associations if a.was_successful == 1)
-        pattern.success_rate = successful / len(associations)
-    
     def get_pattern_with_entries(self, pattern_id: int) -> Optional[Pattern]:
         """Get pattern with all associated entries."""
         return self.db.query(Pattern).options(
@@ -223,21 +324,43 @@ class PatternService:
         Get existing pattern or create new one.
         
         WHY: Convenience method for inline pattern creation
-        during entry saving.
+        during entry saving. The INSERT ... ON CONFLICT DO NOTHING
+        against the lower(name) index cannot race with a concurrent
+        save of the same new name; on a conflict it returns no row and
+        the existing pattern is selected instead.
+        
+        Runs in the caller's transaction, which commits it. Caches are
+        only invalidated when a pattern was actually inserted, since
+        the hit path, the common case, changes nothing.
         """
-        pattern = self.get_pattern_by_name(name)
-        
-        if pattern:
-            return pattern
-        
-        return self.create_pattern(PatternCreate(name=name))
+        stmt = sqlite_insert(Pattern).values(
+            name=name,
+            name_tokens=join_tokens(name),
+            usage_count=0,
+            success_count=0,
+            success_rate=0.0,
+        )
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[func.lower(Pattern.name)],
+        ).returning(Pattern)
+        
+        pattern = self.db.scalars(stmt).one_or_none()
+        if pattern is None:
+            return self.db.query(Pattern).filter(
+                func.lower(Pattern.name) == func.lower(name)
+            ).one()
+        
+        invalidate_pattern_stats_cache()
+        invalidate_recall_cache()
+        return pattern
     
     def suggest_patterns_for_entry(self, entry: Entry) -> List[Pattern]:
         """
         Suggest relevant patterns for an entry.
         
         WHY: Help user discover patterns they might not remember.
-        Uses keyword matching now, embeddings later.
+        Uses keyword matching now, embeddings later. Scoring and the
+        top-5 cut happen in SQL, so only the suggestions are loaded.
         
         Args:
             entry: The entry to suggest patterns for
@@ -245,73 +368,102 @@ class PatternService:
         Returns:
             List of potentially relevant patterns
         """
-        domain_patterns = self.db.query(Pattern).filter(
-            Pattern.domain_tags.ilike(f"%{entry.entry_type.value}%")
-        ).all()
+        title_words = frozenset(entry.title.lower().split())
+        domain_match = Pattern.has_domain(entry.entry_type.value)
         
-        frequent_patterns = self.db.query(Pattern).order_by(
+        frequent_ids = select(Pattern.id).order_by(
             desc(Pattern.usage_count)
-        ).limit(10).all()
-        
-        all_patterns = {p.id: p for p in domain_patterns + frequent_patterns}
-        
-        title_words = set(entry.title.lower().split())
-        scored_patterns = []
-        
-        for pattern in all_patterns.values():
-            score = 0
-            pattern_words = set(pattern.name.lower().split())
-            
-            overlap = len(title_words & pattern_words)
-            if overlap > 0:
-                score += overlap * 2
-            
-            if pattern.domain_tags and entry.entry_type.value in pattern.domain_tags:
-                score += 1
-            
-            score += min(pattern.usage_count / 10, 1)
-            
-            if score > 0:
-                scored_patterns.append((pattern, score))
+        ).limit(10)
+        
+        # Per-row inputs are computed once in a materialized CTE, so the
+        # lowercased name is built once per candidate rather than once per
+        # title word. Padding it with spaces turns "word in name.split()"
+        # into a LIKE.
+        candidates = select(
+            Pattern.id.label("id"),
+            (" " + func.lower(Pattern.name) + " ").label("padded_name"),
+            case((domain_match, 1), else_=0).label("domain_score"),
+            case(
+                (Pattern.usage_count >= 10, 1.0),
+                else_=Pattern.usage_count / 10.0,
+            ).label("usage_score"),
+        ).where(
+            domain_match | Pattern.id.in_(frequent_ids)
+        ).cte("candidates").prefix_with("MATERIALIZED")
+        
+        # Same score as before: 2 per title word in the pattern name,
+        # +1 for a domain match, plus usage capped at 1.
+        name_overlap = sum(
+            (case((candidates.c.padded_name.contains(f" {word} ", autoescape=True), 2), else_=0)
+             for word in title_words),
+            literal(0),
+        )
+        score = name_overlap + candidates.c.domain_score + candidates.c.usage_score
         
-        scored_patterns.sort(key=lambda x: x[1], reverse=True)
-        return [p for p, _ in scored_patterns[:5]]
+        return self.db.query(Pattern).join(
+            candidates, candidates.c.id == Pattern.id
+        ).filter(
+            score > 0
+        ).order_by(desc(score), Pattern.id).limit(5).all()
     
-    def get_cross_domain_patterns(self) -> List[Pattern]:
+    def get_cross_domain_patterns(self, limit: int = 50) -> List[Pattern]:
         """
         Get patterns that appear across multiple domains.
         
-        WHY: These are the most valuable transferable patterns.
+        WHY: These are the most valuable transferable patterns. Bounded
+        by `limit` so the response stays small as the library grows;
+        ix_patterns_usage_count_id serves the ordering.
         """
-        patterns = self.db.query(Pattern).filter(
-            Pattern.domain_tags.isnot(None)
-        ).all()
-        
-        cross_domain = []
-        for pattern in patterns:
-            if pattern.domain_tags:
-                domains = [d.strip() for d in pattern.domain_tags.split(",")]
-                if len(domains) > 1:
-                    cross_domain.append(pattern)
-        
-        return sorted(cross_domain, key=lambda p: p.usage_count, reverse=True)
+        multi_domain = self.db.query(PatternDomain.pattern_id).group_by(
+            PatternDomain.pattern_id
+        ).having(func.count(PatternDomain.id) > 1)
+        
+        return self.db.query(Pattern).filter(
+            Pattern.id.in_(multi_domain)
+        ).order_by(
+            desc(Pattern.usage_count), desc(Pattern.id)
+        ).limit(limit).all()
     
     def get_pattern_stats(self) -> dict:
-        """Get aggregate statistics about patterns."""
-        total = self.db.query(func.count(Pattern.id)).scalar()
+        """
+        Get aggregate statistics about patterns.
         
-        most_used = self.db.query(Pattern).order_by(
+        WHY: Dashboards read this far more often than patterns change,
+        so the result is cached briefly and dropped on every write.
+        """
+        cached = cache.get(PATTERN_STATS_CACHE_KEY)
+        if cached is not None:
+            return cached
+        
+        stats = self._build_pattern_stats()
+        cache.set(PATTERN_STATS_CACHE_KEY, stats, settings.PATTERN_STATS_CACHE_TTL_SECONDS)
+        return stats
+    
+    def _build_pattern_stats(self) -> dict:
+        """
+        Compute pattern statistics from the database.
+        
+        Both counts come from one filtered aggregate, and the top-5
+        lists select only the columns they return instead of whole
+        Pattern objects.
+        """
+        total, unused = self.db.query(
+            func.count(Pattern.id),
+            func.count(Pattern.id).filter(Pattern.usage_count == 0),
+        ).one()
+        
+        most_used = self.db.query(
+            Pattern.id, Pattern.name, Pattern.usage_count
+        ).order_by(
             desc(Pattern.usage_count)
         ).limit(5).all()
         
-        high_success = self.db.query(Pattern).filter(
+        high_success = self.db.query(
+            Pattern.id, Pattern.name, Pattern.success_rate
+        ).filter(
             Pattern.usage_count >= 3
         ).order_by(desc(Pattern.success_rate)).limit(5).all()
         
-        unused = self.db.query(func.count(Pattern.id)).filter(
-            Pattern.usage_count == 0
-        ).scalar()
-        
         return {
             "total_patterns": total,
             "unused_patterns": unused,
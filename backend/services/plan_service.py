@@ -11,16 +11,18 @@ Built with Gemini 2.5 Flash for intelligent plan generation.
 """
 
 import json
+import re
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
 from config import settings
+from database import db_now
 from models.entry import Entry, EntryType
 from models.learning_plan import (
     LearningPlan, PlanMilestone, WeeklySchedule, DailyTask,
@@ -28,6 +30,10 @@ from models.learning_plan import (
 )
 
 
+# Outermost {...} in an LLM reply that may wrap the JSON in prose/fences.
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
 class GeneratedMilestone(BaseModel):
     """Milestone from AI."""
     title: str
@@ -79,22 +85,37 @@ class LearningPlanService:
             )
         else:
             self.llm = None
+        
+        # The weekly-plan prompt is built once here and reused by every
+        # generate_plan call.
+        self._plan_prompt = self._build_plan_prompt()
+        self._plan_chain = self._plan_prompt | self.llm if self.llm else None
     
     def _get_user_history(self, db: Session) -> dict:
-        """Get user's learning history for plan context."""
-        
-        entry_stats = {}
-        for entry_type in EntryType:
-            count = db.query(Entry).filter(
-                Entry.entry_type == entry_type,
-                Entry.is_complete == True
-            ).count()
+        """
+        Get user's learning history for plan context.
+        
+        Per-type counts and the difficulty average come from one
+        GROUP BY; the average is rebuilt from per-type sums and counts.
+        """
+        type_rows = db.query(
+            Entry.entry_type,
+            func.count(Entry.id),
+            func.sum(Entry.difficulty),
+            func.count(Entry.difficulty),
+        ).filter(
+            Entry.is_complete == True
+        ).group_by(Entry.entry_type).all()
+        
+        entry_stats = {entry_type.value: 0 for entry_type in EntryType}
+        difficulty_sum = 0
+        difficulty_count = 0
+        for entry_type, count, type_difficulty_sum, type_difficulty_count in type_rows:
             entry_stats[entry_type.value] = count
+            difficulty_sum += type_difficulty_sum or 0
+            difficulty_count += type_difficulty_count
         
-        avg_diff = db.query(func.avg(Entry.difficulty)).filter(
-            Entry.is_complete == True,
-            Entry.difficulty.isnot(None)
-        ).scalar() or 3.0
+        avg_diff = difficulty_sum / difficulty_count if difficulty_count else 3.0
         
         recent_entries = db.query(Entry.title, Entry.entry_type).filter(
             Entry.is_complete == True,
@@ -110,7 +131,7 @@ class LearningPlanService:
             "recent_topics": recent_topics
         }
     
-    def generate_plan(
+    async def generate_plan(
         self,
         db: Session,
         plan_type: PlanType,
@@ -140,17 +161,18 @@ class LearningPlanService:
             
         Returns:
             Created LearningPlan with milestones and schedules
+        
+        WHY async: The Gemini call takes 10-60s. Awaiting it frees the
+        event loop for other requests; the SQLite reads/writes around it
+        are milliseconds and stay on the sync session.
         """
         if not self.llm:
             raise ValueError("Gemini API key not configured")
         
         user_history = self._get_user_history(db)
         
-        plan_prompt = self._build_plan_prompt()
-        
         try:
-            result = plan_prompt | self.llm
-            response = result.invoke({
+            response = await self._plan_chain.ainvoke({
                 "plan_type": plan_type.value,
                 "primary_goal": primary_goal,
                 "target_weeks": target_weeks,
@@ -180,7 +202,8 @@ class LearningPlanService:
         except Exception as e:
             raise ValueError(f"Plan generation failed: {str(e)}")
     
-    def _build_plan_prompt(self) -> ChatPromptTemplate:
+    @staticmethod
+    def _build_plan_prompt() -> ChatPromptTemplate:
         """Build the plan generation prompt."""
         
         system_prompt = """You are an expert learning coach creating personalized study plans.
@@ -271,9 +294,7 @@ Return JSON:
     
     def _parse_plan_response(self, content: str) -> dict:
         """Parse JSON from AI response."""
-        import re
-        
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
+        json_match = _JSON_OBJECT_RE.search(content)
         if json_match:
             try:
                 return json.loads(json_match.group())
@@ -331,44 +352,65 @@ Return JSON:
         db.add(plan)
         db.flush()
         
+        # Children are bulk-inserted (one executemany per table) rather
+        # than added one ORM object at a time; a plan has ~10-20
+        # milestones and a schedule per week.
         milestones_data = plan_data.get("milestones", [])
-        for idx, ms in enumerate(milestones_data):
-            milestone = PlanMilestone(
-                plan_id=plan.id,
-                title=ms.get("title", f"Milestone {idx + 1}"),
-                description=ms.get("description", ""),
-                order_index=idx,
-                topics=ms.get("topics", []),
-                skills_to_gain=ms.get("skills_to_gain", []),
-                success_criteria=ms.get("success_criteria"),
-                estimated_days=ms.get("estimated_days", 7),
-                recommended_resources=ms.get("recommended_resources", []),
-                recommended_problems=ms.get("recommended_problems", []),
-                status=MilestoneStatus.NOT_STARTED
-            )
-            db.add(milestone)
+        milestone_rows = [
+            {
+                "plan_id": plan.id,
+                "title": ms.get("title", f"Milestone {idx + 1}"),
+                "description": ms.get("description", ""),
+                "order_index": idx,
+                "topics": ms.get("topics", []),
+                "skills_to_gain": ms.get("skills_to_gain", []),
+                "success_criteria": ms.get("success_criteria"),
+                "estimated_days": ms.get("estimated_days", 7),
+                "recommended_resources": ms.get("recommended_resources", []),
+                "recommended_problems": ms.get("recommended_problems", []),
+                "status": MilestoneStatus.NOT_STARTED,
+            }
+            for idx, ms in enumerate(milestones_data)
+        ]
+        if milestone_rows:
+            db.execute(insert(PlanMilestone), milestone_rows)
         
         plan.total_milestones = len(milestones_data)
         
         schedules_data = plan_data.get("weekly_schedules", [])
+        schedule_rows = []
         for ws in schedules_data:
             week_num = ws.get("week_number", 1)
             week_start = start_date + timedelta(weeks=week_num - 1)
             week_end = week_start + timedelta(days=6)
             
-            schedule = WeeklySchedule(
-                plan_id=plan.id,
-                week_number=week_num,
-                week_start_date=week_start,
-                week_end_date=week_end,
-                theme=ws.get("theme"),
-                focus_areas=ws.get("focus_areas", []),
-                daily_tasks=ws.get("daily_tasks", {}),
-                weekly_goals=ws.get("weekly_goals", []),
-                problems_to_solve=ws.get("problems_to_solve", 0),
-                concepts_to_learn=ws.get("concepts_to_learn", 0)
-            )
-            db.add(schedule)
+            schedule_rows.append({
+                "plan_id": plan.id,
+                "week_number": week_num,
+                "week_start_date": week_start,
+                "week_end_date": week_end,
+                "theme": ws.get("theme"),
+                "focus_areas": ws.get("focus_areas", []),
+                "daily_tasks": ws.get("daily_tasks", {}),
+                "weekly_goals": ws.get("weekly_goals", []),
+                "problems_to_solve": ws.get("problems_to_solve", 0),
+                "concepts_to_learn": ws.get("concepts_to_learn", 0),
+            })
+        if schedule_rows:
+            schedule_ids = db.scalars(
+                insert(WeeklySchedule).returning(
+                    WeeklySchedule.id, sort_by_parameter_order=True
+                ),
+                schedule_rows
+            ).all()
+            
+            task_rows = []
+            for schedule_id, row in zip(schedule_ids, schedule_rows):
+                task_rows.extend(DailyTask.rows_from_schedule(
+                    schedule_id, row["daily_tasks"]
+                ))
+            if task_rows:
+                db.execute(insert(DailyTask), task_rows)
         
         db.commit()
         db.refresh(plan)
@@ -376,45 +418,71 @@ Return JSON:
         return plan
     
     def get_todays_tasks(self, db: Session) -> dict:
-        """Get all tasks scheduled for today across active plans."""
+        """
+        Get all tasks scheduled for today across active plans.
+        
+        One JOIN down to DailyTask rows for today's weekday, so only
+        today's tasks are loaded rather than each week's JSON blob.
+        """
         
         today = date.today()
         day_name = today.strftime("%A").lower()
         
-        active_plans = db.query(LearningPlan).filter(
-            LearningPlan.status == PlanStatus.ACTIVE
-        ).all()
+        # Same "first schedule covering today" per plan as before
+        current_schedule_ids = db.query(
+            func.min(WeeklySchedule.id)
+        ).join(
+            LearningPlan, WeeklySchedule.plan_id == LearningPlan.id
+        ).filter(
+            LearningPlan.status == PlanStatus.ACTIVE,
+            WeeklySchedule.week_start_date <= today,
+            WeeklySchedule.week_end_date >= today
+        ).group_by(WeeklySchedule.plan_id)
+        
+        rows = db.query(
+            LearningPlan.id,
+            LearningPlan.title,
+            LearningPlan.plan_type,
+            DailyTask
+        ).join(
+            WeeklySchedule, WeeklySchedule.plan_id == LearningPlan.id
+        ).join(
+            DailyTask, DailyTask.schedule_id == WeeklySchedule.id
+        ).filter(
+            WeeklySchedule.id.in_(current_schedule_ids),
+            DailyTask.day_of_week == today.weekday()
+        ).order_by(LearningPlan.id, DailyTask.id).all()
         
         all_tasks = []
         plans_involved = []
-        
-        for plan in active_plans:
-            current_schedule = db.query(WeeklySchedule).filter(
-                WeeklySchedule.plan_id == plan.id,
-                WeeklySchedule.week_start_date <= today,
-                WeeklySchedule.week_end_date >= today
-            ).first()
+        seen_plans = set()
+        
+        for plan_id, plan_title, plan_type, task in rows:
+            all_tasks.append({
+                "id": task.id,
+                "title": task.title,
+                "type": task.task_type,
+                "estimated_minutes": task.estimated_minutes,
+                "resource_url": task.resource_url,
+                "is_completed": task.is_completed,
+                "plan_id": plan_id,
+                "plan_title": plan_title
+            })
             
-            if current_schedule and current_schedule.daily_tasks:
-                day_tasks = current_schedule.daily_tasks.get(day_name, [])
-                for task in day_tasks:
-                    task["plan_id"] = plan.id
-                    task["plan_title"] = plan.title
-                    all_tasks.append(task)
-                
-                if day_tasks:
-                    plans_involved.append({
-                        "id": plan.id,
-                        "title": plan.title,
-                        "plan_type": plan.plan_type.value
-                    })
+            if plan_id not in seen_plans:
+                seen_plans.add(plan_id)
+                plans_involved.append({
+                    "id": plan_id,
+                    "title": plan_title,
+                    "plan_type": plan_type.value
+                })
         
         return {
             "date": today.isoformat(),
             "day": day_name,
             "total_tasks": len(all_tasks),
             "tasks": all_tasks,
-            "estimated_total_minutes": sum(t.get("estimated_minutes", 30) for t in all_tasks),
+            "estimated_total_minutes": sum(t["estimated_minutes"] for t in all_tasks),
             "plans_involved": plans_involved
         }
     
@@ -442,7 +510,7 @@ Return JSON:
         if extend_weeks and plan.target_end_date:
             plan.target_end_date = plan.target_end_date + timedelta(weeks=extend_weeks)
         
-        plan.last_adapted_at = datetime.utcnow()
+        plan.last_adapted_at = db_now()
         plan.adaptation_notes = f"{plan.adaptation_notes or ''}\n[{datetime.utcnow().date()}] {reason}"
         
         if self.llm and shift_focus:
@@ -459,23 +527,21 @@ Return JSON:
         if not plan:
             raise ValueError("Plan not found")
         
-        completed_milestones = db.query(PlanMilestone).filter(
-            PlanMilestone.plan_id == plan_id,
-            PlanMilestone.status == MilestoneStatus.COMPLETED
-        ).count()
-        
-        total_milestones = db.query(PlanMilestone).filter(
-            PlanMilestone.plan_id == plan_id
-        ).count()
-        
-        completed_weeks = db.query(WeeklySchedule).filter(
-            WeeklySchedule.plan_id == plan_id,
-            WeeklySchedule.is_completed == True
-        ).count()
+        # One aggregate per table; the (plan_id, status/is_completed)
+        # indexes let SQLite answer both counts without touching rows.
+        total_milestones, completed_milestones = db.query(
+            func.count(PlanMilestone.id),
+            func.count(PlanMilestone.id).filter(
+                PlanMilestone.status == MilestoneStatus.COMPLETED
+            )
+        ).filter(PlanMilestone.plan_id == plan_id).one()
         
-        total_weeks = db.query(WeeklySchedule).filter(
-            WeeklySchedule.plan_id == plan_id
-        ).count()
+        total_weeks, completed_weeks = db.query(
+            func.count(WeeklySchedule.id),
+            func.count(WeeklySchedule.id).filter(
+                WeeklySchedule.is_completed == True
+            )
+        ).filter(WeeklySchedule.plan_id == plan_id).one()
         
         if plan.start_date:
             days_since_start = (date.today() - plan.start_date).days
@@ -12,15 +12,47 @@ PHILOSOPHY: Your past struggles are your best teacher.
 This service makes that wisdom accessible.
 """
 
+import heapq
 from datetime import datetime, timedelta
+from itertools import chain
+from operator import attrgetter, itemgetter
 from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, desc, func, literal_column, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import json
 
-from models import Entry, Pattern, Reflection, EntryPattern, BlockerAnalytics, RevisionHistory
-from models.entry import EntryType
+from models import (
+    Entry, Pattern, Reflection, EntryPattern, BlockerAnalytics, RevisionHistory,
+    blocker_entries,
+)
+from models.entry import EntryType, entry_search
+from cache import cache
 from config import settings
+from search_tokens import split_tokens, tokenize
+from services.embedding_service import get_embedding_service, mmr
+
+
+RECALL_CACHE_PREFIX = "recall:"
+
+# Keyword similarity weights: per shared title word, per shared
+# reflection word, and once for any linked pattern sharing a word.
+TITLE_WEIGHT = 0.3
+REFLECTION_WEIGHT = 0.2
+PATTERN_BONUS = 0.2
+
+# Every attribute _calculate_similarity reads from an entry, in one call.
+_scored_fields = attrgetter("title_tokens", "reflection", "patterns")
+
+
+def invalidate_recall_cache():
+    """
+    Drop cached recall contexts.
+    
+    WHY: Called by writers of entries, reflections, patterns, blockers
+    and revisions, so a draft's recall panel reflects the last save.
+    """
+    cache.invalidate(RECALL_CACHE_PREFIX)
 
 
 class RecallService:
@@ -43,7 +75,8 @@ class RecallService:
         entry_type: Optional[EntryType] = None,
         description: Optional[str] = None,
         keywords: Optional[List[str]] = None,
-        limit: int = 5
+        limit: int = 5,
+        now: Optional[datetime] = None,
     ) -> List[Dict]:
         """
         Find entries similar to the given context.
@@ -51,37 +84,47 @@ class RecallService:
         WHY: Before solving a problem, see if you've solved
         something similar. Learn from your past self.
         
-        Current implementation: Keyword matching
-        Future: Embedding-based semantic search
+        With embeddings enabled, entries are ranked by cosine
+        similarity to the query text. Otherwise SQLite full-text
+        search picks the candidates and keyword overlap ranks them.
         """
+        now = now or datetime.utcnow()
         results = []
         
-        search_terms = set()
-        if title:
-            search_terms.update(title.lower().split())
-        if description:
-            search_terms.update(description.lower().split())
-        if keywords:
-            search_terms.update(k.lower() for k in keywords)
+        search_terms = tokenize(title, description, *(keywords or ()))
         
-        stop_words = {'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'is', 'are'}
-        search_terms -= stop_words
+        # Scoring and the result dicts read reflection and pattern names,
+        # so load them up front rather than lazily once per entry.
+        base = self.db.query(Entry).options(
+            joinedload(Entry.reflection),
+            selectinload(Entry.patterns).joinedload(EntryPattern.pattern),
+        ).filter(Entry.is_complete == True)
+        if entry_type:
+            base = base.filter(Entry.entry_type == entry_type)
         
         if not search_terms:
-            query = self.db.query(Entry).filter(Entry.is_complete == True)
-            if entry_type:
-                query = query.filter(Entry.entry_type == entry_type)
-            entries = query.order_by(desc(Entry.created_at)).limit(limit).all()
+            entries = base.order_by(desc(Entry.created_at)).limit(limit).all()
             
             for entry in entries:
-                results.append(self._entry_to_similar_result(entry, 0.5, "Recent entry"))
+                results.append(self._entry_to_similar_result(entry, 0.5, "Recent entry", now))
             return results
         
-        query = self.db.query(Entry).filter(Entry.is_complete == True)
-        if entry_type:
-            query = query.filter(Entry.entry_type == entry_type)
-        
-        entries = query.all()
+        embeddings = get_embedding_service()
+        if embeddings.available:
+            query_text = " ".join(filter(None, [title, description, *(keywords or [])]))
+            return self._semantic_similar_entries(base, embeddings, query_text, limit, now)
+        
+        # Full-text search narrows the corpus to the best-ranked
+        # candidates; only those are scored in Python.
+        fts = literal_column("entry_search")
+        match = " OR ".join('"%s"' % term.replace('"', '""') for term in search_terms)
+        entries = base.join(
+            entry_search, entry_search.c.rowid == Entry.id
+        ).filter(
+            fts.op("MATCH")(match)
+        ).order_by(
+            func.bm25(fts)
+        ).limit(settings.RECALL_CANDIDATE_LIMIT).all()
         
         scored_entries = []
         for entry in entries:
@@ -89,13 +132,44 @@ class RecallService:
             if score > 0:
                 scored_entries.append((entry, score, reason))
         
-        scored_entries.sort(key=lambda x: x[1], reverse=True)
-        
-        for entry, score, reason in scored_entries[:limit]:
-            results.append(self._entry_to_similar_result(entry, score, reason))
+        for entry, score, reason in heapq.nlargest(limit, scored_entries, key=itemgetter(1)):
+            results.append(self._entry_to_similar_result(entry, score, reason, now))
         
         return results
     
+    def _semantic_similar_entries(
+        self, base, embeddings, query_text: str, limit: int, now: datetime
+    ) -> List[Dict]:
+        """
+        Rank entries by embedding similarity.
+        
+        WHY: The vector search covers every embedded entry; `base`
+        then applies the completeness/type filters to the nearest
+        candidates only. MMR over those candidates keeps near-duplicate
+        entries from filling every slot.
+        """
+        scores = dict(embeddings.search(self.db, query_text, settings.RECALL_CANDIDATE_LIMIT))
+        if not scores:
+            return []
+        
+        entries = base.filter(Entry.id.in_(scores)).all()
+        if not entries:
+            return []
+        
+        picks = mmr(
+            [scores[entry.id] for entry in entries],
+            [entry.embedding for entry in entries],
+            limit,
+            settings.RECALL_MMR_LAMBDA,
+        )
+        
+        return [
+            self._entry_to_similar_result(
+                entries[i], max(scores[entries[i].id], 0.0), "Semantic match", now
+            )
+            for i in picks
+        ]
+    
     def _calculate_similarity(
         self, 
         entry: Entry, 
@@ -109,31 +183,36 @@ class RecallService:
         """
         score = 0.0
         reasons = []
+        title_tokens, reflection, entry_patterns = _scored_fields(entry)
         
-        title_words = set(entry.title.lower().split())
-        title_overlap = len(search_terms & title_words)
-        if title_overlap > 0:
-            score += title_overlap * 0.3
+        # intersection() takes the split list directly, so no
+        # per-entry set is built just to be intersected once.
+        title_overlap = len(search_terms.intersection((title_tokens or "").split()))
+        if title_overlap:
+            score += title_overlap * TITLE_WEIGHT
             reasons.append("Title match")
         
-        if entry.reflection:
-            reflection_text = " ".join([
-                entry.reflection.context or "",
-                entry.reflection.key_pattern or "",
-                entry.reflection.initial_blocker or "",
-            ]).lower()
-            reflection_words = set(reflection_text.split())
-            reflection_overlap = len(search_terms & reflection_words)
-            if reflection_overlap > 0:
-                score += reflection_overlap * 0.2
+        if reflection:
+            reflection_overlap = len(
+                search_terms.intersection((reflection.search_tokens or "").split())
+            )
+            if reflection_overlap:
+                score += reflection_overlap * REFLECTION_WEIGHT
                 reasons.append("Reflection match")
         
-        for ep in entry.patterns:
-            pattern_words = set(ep.pattern.name.lower().split())
-            if search_terms & pattern_words:
-                score += 0.2
-                reasons.append(f"Pattern: {ep.pattern.name}")
-                break
+        # One early-out disjointness test over every pattern's tokens
+        # decides the bonus; naming the matching pattern only happens
+        # when there is a match.
+        pattern_words = chain.from_iterable(
+            (ep.pattern.name_tokens or "").split() for ep in entry_patterns
+        )
+        if not search_terms.isdisjoint(pattern_words):
+            score += PATTERN_BONUS
+            matched = next(
+                ep.pattern for ep in entry_patterns
+                if not search_terms.isdisjoint(split_tokens(ep.pattern.name_tokens))
+            )
+            reasons.append(f"Pattern: {matched.name}")
         
         return score, ", ".join(reasons) if reasons else "General match"
     
@@ -141,10 +220,11 @@ class RecallService:
         self, 
         entry: Entry, 
         score: float, 
-        reason: str
+        reason: str,
+        now: datetime,
     ) -> Dict:
         """Convert entry to similar result dict."""
-        days_ago = (datetime.utcnow() - entry.created_at).days
+        days_ago = (now - entry.created_at).days
         
         return {
             "entry_id": entry.id,
@@ -159,7 +239,8 @@ class RecallService:
     def get_blocker_warnings(
         self, 
         context: Optional[str] = None,
-        entry_type: Optional[EntryType] = None
+        entry_type: Optional[EntryType] = None,
+        now: Optional[datetime] = None,
     ) -> List[str]:
         """
         Get warnings about repeated blockers.
@@ -169,34 +250,39 @@ class RecallService:
         """
         warnings = []
         
-        flagged = self.db.query(BlockerAnalytics).filter(
+        # Plain tuples: only two columns are read, so skip hydrating
+        # BlockerAnalytics objects and their JSON entry id lists.
+        flagged = self.db.query(
+            BlockerAnalytics.occurrence_count,
+            func.substr(BlockerAnalytics.blocker_text, 1, 100),
+        ).filter(
             BlockerAnalytics.is_flagged == True
         ).all()
         
-        for blocker in flagged:
+        for occurrence_count, blocker_text in flagged:
             warnings.append(
-                f"⚠️ Repeated blocker ({blocker.occurrence_count}x): "
-                f"{blocker.blocker_text[:100]}..."
+                f"⚠️ Repeated blocker ({occurrence_count}x): "
+                f"{blocker_text}..."
             )
         
         if entry_type:
-            recent_entries = self.db.query(Entry).filter(
+            # Grouped and thresholded in SQL: only repeated blockers
+            # come back, not every recent entry and its reflection.
+            blocker = Reflection.initial_blocker_prefix
+            repeated = self.db.query(
+                blocker, func.count(Reflection.id)
+            ).join(Entry, Entry.id == Reflection.entry_id).filter(
                 Entry.entry_type == entry_type,
                 Entry.is_complete == True,
-                Entry.created_at >= datetime.utcnow() - timedelta(days=30)
-            ).all()
-            
-            blocker_counts = {}
-            for entry in recent_entries:
-                if entry.reflection:
-                    blocker = entry.reflection.initial_blocker[:50]
-                    blocker_counts[blocker] = blocker_counts.get(blocker, 0) + 1
+                Entry.created_at >= (now or datetime.utcnow()) - timedelta(days=30)
+            ).group_by(blocker).having(
+                func.count(Reflection.id) >= settings.BLOCKER_REPEAT_THRESHOLD
+            ).order_by(desc(func.count(Reflection.id))).all()
             
-            for blocker, count in blocker_counts.items():
-                if count >= settings.BLOCKER_REPEAT_THRESHOLD:
-                    warnings.append(
-                        f"🔄 In last 30 days, similar blocker appeared {count}x: {blocker}..."
-                    )
+            for text, count in repeated:
+                warnings.append(
+                    f"🔄 In last 30 days, similar blocker appeared {count}x: {text}..."
+                )
         
         return warnings
     
@@ -215,17 +301,11 @@ class RecallService:
         """
         results = []
         
-        search_terms = set()
-        if title:
-            search_terms.update(title.lower().split())
-        if keywords:
-            search_terms.update(k.lower() for k in keywords)
+        search_terms = tokenize(title, *(keywords or ()))
         
         query = self.db.query(Pattern)
         if entry_type:
-            query = query.filter(
-                Pattern.domain_tags.ilike(f"%{entry_type.value}%")
-            )
+            query = query.filter(Pattern.has_domain(entry_type.value))
         
         patterns = query.all()
         
@@ -234,14 +314,12 @@ class RecallService:
             score = 0
             reason = []
             
-            pattern_words = set(pattern.name.lower().split())
-            if search_terms & pattern_words:
+            if search_terms & split_tokens(pattern.name_tokens):
                 score += 0.4
                 reason.append("Name match")
             
-            if pattern.common_triggers:
-                trigger_words = set(pattern.common_triggers.lower().split())
-                if search_terms & trigger_words:
+            if pattern.trigger_tokens:
+                if search_terms & split_tokens(pattern.trigger_tokens):
                     score += 0.3
                     reason.append("Trigger match")
             
@@ -252,9 +330,7 @@ class RecallService:
             if score > 0:
                 scored.append((pattern, score, ", ".join(reason) or "Domain match"))
         
-        scored.sort(key=lambda x: x[1], reverse=True)
-        
-        for pattern, score, reason in scored[:limit]:
+        for pattern, score, reason in heapq.nlargest(limit, scored, key=itemgetter(1)):
             results.append({
                 "pattern_id": pattern.id,
                 "pattern_name": pattern.name,
@@ -269,7 +345,9 @@ class RecallService:
         
         return results
     
-    def get_revision_suggestions(self, limit: int = 5) -> List[Dict]:
+    def get_revision_suggestions(
+        self, limit: int = 5, now: Optional[datetime] = None
+    ) -> List[Dict]:
         """
         Suggest items that need revision.
         
@@ -283,45 +361,55 @@ class RecallService:
         """
         suggestions = []
         
-        low_confidence = self.db.query(Entry).join(Reflection).filter(
+        # Each branch selects just the columns its suggestion text
+        # uses, as tuples, instead of hydrating full ORM rows.
+        low_confidence = self.db.query(
+            Entry.id, Entry.title, Reflection.confidence_level, Reflection.key_pattern
+        ).join(Reflection).filter(
             Reflection.confidence_level <= 2,
             Entry.is_complete == True
         ).order_by(Entry.created_at).limit(3).all()
         
-        for entry in low_confidence:
+        for entry_id, title, confidence_level, key_pattern in low_confidence:
             suggestions.append({
                 "type": "revision_due",
-                "title": f"Review: {entry.title}",
-                "description": f"Low confidence ({entry.reflection.confidence_level}/5) on pattern: {entry.reflection.key_pattern}",
+                "title": f"Review: {title}",
+                "description": f"Low confidence ({confidence_level}/5) on pattern: {key_pattern}",
                 "priority": 1,
-                "related_entry_id": entry.id,
+                "related_entry_id": entry_id,
                 "action_text": "Revisit and re-attempt",
             })
         
-        cutoff_date = datetime.utcnow() - timedelta(days=settings.REVISION_WINDOW_DAYS)
-        old_entries = self.db.query(Entry).filter(
+        # Anti-join: old entries with no revision inside the window,
+        # in one query instead of a revision probe per entry.
+        now = now or datetime.utcnow()
+        cutoff_date = now - timedelta(days=settings.REVISION_WINDOW_DAYS)
+        unrevised = self.db.query(Entry.id, Entry.title, Entry.created_at).outerjoin(
+            RevisionHistory,
+            and_(
+                RevisionHistory.entry_id == Entry.id,
+                RevisionHistory.revised_at >= cutoff_date,
+            ),
+        ).filter(
             Entry.is_complete == True,
             Entry.created_at < cutoff_date,
+            RevisionHistory.id.is_(None),
         ).order_by(Entry.created_at).limit(3).all()
         
-        for entry in old_entries:
-            recent_revision = self.db.query(RevisionHistory).filter(
-                RevisionHistory.entry_id == entry.id,
-                RevisionHistory.revised_at >= cutoff_date
-            ).first()
-            
-            if not recent_revision:
-                days_old = (datetime.utcnow() - entry.created_at).days
-                suggestions.append({
-                    "type": "revision_due",
-                    "title": f"Review: {entry.title}",
-                    "description": f"Not reviewed in {days_old} days",
-                    "priority": 2,
-                    "related_entry_id": entry.id,
-                    "action_text": "Test your recall",
-                })
-        
-        low_success_patterns = self.db.query(Pattern).filter(
+        for entry_id, title, created_at in unrevised:
+            days_old = (now - created_at).days
+            suggestions.append({
+                "type": "revision_due",
+                "title": f"Review: {title}",
+                "description": f"Not reviewed in {days_old} days",
+                "priority": 2,
+                "related_entry_id": entry_id,
+                "action_text": "Test your recall",
+            })
+        
+        low_success_patterns = self.db.query(
+            Pattern.id, Pattern.name, Pattern.success_rate, Pattern.usage_count
+        ).filter(
             Pattern.usage_count >= 2,
             Pattern.success_rate < 0.5
         ).order_by(Pattern.success_rate).limit(3).all()
@@ -336,8 +424,7 @@ class RecallService:
                 "action_text": "Practice this pattern",
             })
         
-        suggestions.sort(key=lambda x: x["priority"])
-        return suggestions[:limit]
+        return heapq.nsmallest(limit, suggestions, key=itemgetter("priority"))
     
     def get_full_recall_context(
         self,
@@ -350,17 +437,44 @@ class RecallService:
         Get complete recall context before starting new work.
         
         WHY: One-stop method to get all relevant history
-        before diving into a new problem/task.
+        before diving into a new problem/task. The clock is read
+        once, so every section measures age from the same instant.
+        
+        The same draft is re-queried as the user edits it, so results
+        are cached per input for a short TTL and dropped on writes.
         """
+        cache_key = RECALL_CACHE_PREFIX + json.dumps([
+            title,
+            entry_type.value if entry_type else None,
+            description,
+            sorted(keywords or ()),
+        ])
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        context = self._build_full_recall_context(title, entry_type, description, keywords)
+        cache.set(cache_key, context, settings.RECALL_CACHE_TTL_SECONDS)
+        return context
+    
+    def _build_full_recall_context(
+        self,
+        title: Optional[str],
+        entry_type: Optional[EntryType],
+        description: Optional[str],
+        keywords: Optional[List[str]],
+    ) -> Dict:
+        """Run the four recall sections against the database."""
+        now = datetime.utcnow()
         return {
             "similar_entries": self.get_similar_entries(
-                title, entry_type, description, keywords
+                title, entry_type, description, keywords, now=now
             ),
             "relevant_patterns": self.get_relevant_patterns(
                 title, entry_type, keywords
             ),
-            "blocker_warnings": self.get_blocker_warnings(description, entry_type),
-            "revision_suggestions": self.get_revision_suggestions(),
+            "blocker_warnings": self.get_blocker_warnings(description, entry_type, now=now),
+            "revision_suggestions": self.get_revision_suggestions(now=now),
         }
     
     def record_blocker(self, entry_id: int, blocker_text: str):
@@ -368,31 +482,40 @@ class RecallService:
         Record a blocker for analytics.
         
         WHY: Track blockers to identify systematic weaknesses.
-        Called when a reflection is saved.
+        Called when a reflection is saved. Two statements and no
+        read-modify-write: an upsert keyed on blocker_hash that counts
+        the occurrence, then an idempotent insert linking the entry.
         """
         normalized = blocker_text.strip().lower()[:200]
-        
-        existing = self.db.query(BlockerAnalytics).filter(
-            BlockerAnalytics.blocker_text.ilike(f"%{normalized[:50]}%")
-        ).first()
-        
-        if existing:
-            existing.occurrence_count += 1
-            existing.last_seen_at = datetime.utcnow()
-            
-            entry_ids = json.loads(existing.entry_ids)
-            if entry_id not in entry_ids:
-                entry_ids.append(entry_id)
-                existing.entry_ids = json.dumps(entry_ids)
-            
-            if existing.occurrence_count >= settings.BLOCKER_REPEAT_THRESHOLD:
-                existing.is_flagged = True
-        else:
-            blocker = BlockerAnalytics(
-                blocker_text=normalized,
-                entry_ids=json.dumps([entry_id]),
-                occurrence_count=1,
-            )
-            self.db.add(blocker)
+        now = datetime.utcnow()
+        
+        upsert = sqlite_insert(BlockerAnalytics).values(
+            blocker_text=normalized,
+            blocker_hash=BlockerAnalytics.hash_for(normalized),
+            occurrence_count=1,
+            is_flagged=settings.BLOCKER_REPEAT_THRESHOLD <= 1,
+            first_seen_at=now,
+            last_seen_at=now,
+        )
+        occurrence_count = BlockerAnalytics.occurrence_count + 1
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[BlockerAnalytics.blocker_hash],
+            set_={
+                "occurrence_count": occurrence_count,
+                "last_seen_at": upsert.excluded.last_seen_at,
+                "is_flagged": or_(
+                    BlockerAnalytics.is_flagged,
+                    occurrence_count >= settings.BLOCKER_REPEAT_THRESHOLD,
+                ),
+            },
+        ).returning(BlockerAnalytics.id)
+        blocker_id = self.db.execute(upsert).scalar_one()
+        
+        self.db.execute(
+            sqlite_insert(blocker_entries).values(
+                blocker_id=blocker_id, entry_id=entry_id
+            ).on_conflict_do_nothing()
+        )
         
         self.db.commit()
+        invalidate_recall_cache()
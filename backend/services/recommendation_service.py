@@ -8,15 +8,20 @@ actionable recommendations tailored to their goals.
 Built with Gemini 2.5 Flash for intelligent recommendation generation.
 """
 
+import hashlib
 import json
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from pydantic import BaseModel, Field
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
+from cache import cache
 from config import settings
 from models.entry import Entry, EntryType
 from models.reflection import Reflection
@@ -25,6 +30,68 @@ from models.recommendation import (
     Recommendation, RecommendationType, 
     RecommendationPriority, RecommendationDomain
 )
+from services.recall_service import RECALL_CACHE_PREFIX
+
+
+# The context is built from the same entries, reflections and patterns
+# recall reads, so it lives under the recall prefix: every writer that
+# calls invalidate_recall_cache() drops it too.
+USER_CONTEXT_CACHE_KEY = RECALL_CACHE_PREFIX + "user_context"
+
+RESPONSE_CACHE_PREFIX = "recommendations:"
+
+
+def invalidate_recommendation_cache():
+    """
+    Drop cached Gemini responses.
+    
+    WHY: Called when a recommendation is completed, dismissed, rated or
+    deleted, so nothing generated before the change is served after it.
+    """
+    cache.invalidate(RESPONSE_CACHE_PREFIX)
+
+
+def _response_cache_key(kind: str, *inputs) -> str:
+    """
+    Cache key for an LLM response, derived from everything in its prompt.
+    
+    WHY: The user context only changes when entries, reflections or
+    patterns do, so an unchanged profile and request means the model
+    would be asked the same question again. Hashing keeps keys short.
+    """
+    digest = hashlib.sha1(
+        json.dumps(inputs, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{RESPONSE_CACHE_PREFIX}{kind}:{digest}"
+
+
+def _compact_json(value) -> str:
+    """JSON without indentation or spaces: fewer prompt tokens, same content."""
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+# Role and rules shared by the recommendation and combined prompts.
+# No template variables, so it also works as a literal prompt prefix.
+RECOMMENDATION_GUIDELINES = """You are an expert mentor for developers learning DSA, competitive programming, 
+backend development, and AI/ML. Generate personalized learning recommendations based on the user's history.
+
+GENERATION GUIDELINES:
+1. **Analyze Patterns**: Look at what they've worked on, where they struggled, what patterns they've learned
+2. **Identify Gaps**: What fundamental concepts might they be missing?
+3. **Build Progressively**: Recommendations should build on what they know
+4. **Mix Types**: Include different types (problems, concepts, resources, revisions)
+5. **Be Specific**: Give specific problem names, resource links when possible
+6. **Explain WHY**: The reasoning field is crucial - explain why THIS recommendation for THIS user
+
+DIFFICULTY MAPPING:
+- Level 1-2: Beginner (basic concepts, easy LeetCode)
+- Level 3: Intermediate (medium LeetCode, real projects)
+- Level 4-5: Advanced (hard problems, system design)
+
+RESOURCE SUGGESTIONS:
+- DSA/CP: LeetCode, NeetCode, Codeforces, AtCoder
+- Backend: FastAPI docs, Real Python, System Design Primer
+- AI/ML: Fast.ai, Andrew Ng courses, Papers with Code"""
 
 
 class GeneratedRecommendation(BaseModel):
@@ -50,14 +117,38 @@ class RecommendationSet(BaseModel):
     weekly_focus: str = Field(description="Suggested focus area for the week")
 
 
+class GeneratedQuickRecommendation(BaseModel):
+    """One thing to do right now, from AI."""
+    title: str = Field(description="Specific action to take")
+    description: str = Field(description="Brief explanation")
+    rec_type: str = Field(description="One of: problem, concept, resource, practice")
+    domain: str = Field(description="One of: dsa, cp, backend, ai_ml, general")
+    reasoning: str = Field(description="Why this specifically")
+    resource_url: Optional[str] = Field(None, description="Link if applicable")
+    estimated_minutes: int = Field(description="Estimated time in minutes")
+
+
 class SkillGapResult(BaseModel):
     """Skill gap analysis result."""
-    domain: str
-    current_level: int
-    gaps: List[str]
-    strengths: List[str]
-    improvement_areas: List[str]
-    suggested_focus: str
+    domain: str = Field(description="One of: dsa, cp, backend, ai_ml")
+    current_level: int = Field(description="Estimated current level 1-10")
+    identified_gaps: List[str] = Field(description="What they seem to be missing")
+    strengths: List[str] = Field(description="What they're doing well")
+    improvement_areas: List[str] = Field(description="Areas to improve")
+    suggested_focus: str = Field(description="Suggested next focus")
+
+
+class SkillGapSet(BaseModel):
+    """Skill gap analysis across domains from AI."""
+    skill_gaps: List[SkillGapResult]
+
+
+class RecommendationBundle(BaseModel):
+    """Recommendations, a quick pick and skill gaps from one AI call."""
+    recommendations: List[GeneratedRecommendation]
+    weekly_focus: str = Field(description="Suggested focus area for the week")
+    quick_recommendation: GeneratedQuickRecommendation
+    skill_gaps: List[SkillGapResult]
 
 
 class RecommendationService:
@@ -68,6 +159,32 @@ class RecommendationService:
     targeted, actionable recommendations.
     """
     
+    # Model output strings to enums, built once at import instead of
+    # on every call (the mappers run once per generated recommendation).
+    _REC_TYPE_MAP = {
+        "problem": RecommendationType.PROBLEM,
+        "concept": RecommendationType.CONCEPT,
+        "resource": RecommendationType.RESOURCE,
+        "practice": RecommendationType.PRACTICE,
+        "revision": RecommendationType.REVISION,
+        "project": RecommendationType.PROJECT,
+        "challenge": RecommendationType.CHALLENGE,
+    }
+    _DOMAIN_MAP = {
+        "dsa": RecommendationDomain.DSA,
+        "cp": RecommendationDomain.CP,
+        "backend": RecommendationDomain.BACKEND,
+        "ai_ml": RecommendationDomain.AI_ML,
+        "system_design": RecommendationDomain.SYSTEM_DESIGN,
+        "general": RecommendationDomain.GENERAL,
+    }
+    _PRIORITY_MAP = {
+        "critical": RecommendationPriority.CRITICAL,
+        "high": RecommendationPriority.HIGH,
+        "medium": RecommendationPriority.MEDIUM,
+        "low": RecommendationPriority.LOW,
+    }
+    
     def __init__(self):
         if settings.GEMINI_API_KEY:
             self.llm = ChatGoogleGenerativeAI(
@@ -76,108 +193,228 @@ class RecommendationService:
                 temperature=0.4,  # Slightly creative for recommendations
                 max_retries=0,  # Fail fast on quota errors
             )
-            self.parser = JsonOutputParser(pydantic_object=RecommendationSet)
-            self._recommendation_chain = None
         else:
             self.llm = None
+        
+        # One parser-and-prompt pair per output shape (recommendations,
+        # quick pick, skill gaps, full bundle), each with its JSON schema
+        # already filled in, so requests only supply the user context.
+        self.parser = JsonOutputParser(pydantic_object=RecommendationSet)
+        self._recommendation_prompt = self._build_recommendation_prompt(
+            self.parser.get_format_instructions()
+        )
+        self._quick_parser = JsonOutputParser(pydantic_object=GeneratedQuickRecommendation)
+        self._quick_prompt = self._build_quick_prompt().partial(
+            format_instructions=self._quick_parser.get_format_instructions()
+        )
+        self._skill_gap_parser = JsonOutputParser(pydantic_object=SkillGapSet)
+        self._skill_gap_prompt = self._build_skill_gap_prompt().partial(
+            format_instructions=self._skill_gap_parser.get_format_instructions()
+        )
+        self._bundle_parser = JsonOutputParser(pydantic_object=RecommendationBundle)
+        self._bundle_prompt = self._build_bundle_prompt(
+            self._bundle_parser.get_format_instructions()
+        )
+        if self.llm:
+            self._recommendation_chain = self._recommendation_prompt | self.llm | self.parser
+            self._quick_chain = self._quick_prompt | self.llm | self._quick_parser
+            self._skill_gap_chain = self._skill_gap_prompt | self.llm | self._skill_gap_parser
+            self._bundle_chain = self._bundle_prompt | self.llm | self._bundle_parser
+        else:
+            self._recommendation_chain = None
+            self._quick_chain = None
+            self._skill_gap_chain = None
+            self._bundle_chain = None
     
     def _get_user_context(self, db: Session) -> dict:
         """
         Gather user's learning history for AI context.
         
         Returns comprehensive profile of user's learning journey.
+        
+        WHY cached: Generating recommendations, a quick pick and a
+        skill-gap analysis back to back would otherwise rebuild the
+        same profile three times. Treat the result as read-only.
+        """
+        cached = cache.get(USER_CONTEXT_CACHE_KEY)
+        if cached is not None:
+            return cached
+        
+        context = self._build_user_context(db)
+        cache.set(USER_CONTEXT_CACHE_KEY, context, settings.RECALL_CACHE_TTL_SECONDS)
+        return context
+    
+    def _build_user_context(self, db: Session) -> dict:
         """
-        entry_stats = {}
-        for entry_type in EntryType:
-            count = db.query(Entry).filter(
-                Entry.entry_type == entry_type,
-                Entry.is_complete == True
-            ).count()
+        Build the profile _get_user_context caches.
+        
+        Per-type counts and the difficulty average come from one
+        GROUP BY, and reflections of the recent entries are joined in,
+        not a query per type or entry.
+        """
+        now = datetime.utcnow()
+        
+        type_rows = db.query(
+            Entry.entry_type,
+            func.count(Entry.id),
+            func.sum(Entry.difficulty),
+            func.count(Entry.difficulty),
+        ).filter(
+            Entry.is_complete == True
+        ).group_by(Entry.entry_type).all()
+        
+        entry_stats = {entry_type.value: 0 for entry_type in EntryType}
+        difficulty_sum = 0
+        difficulty_count = 0
+        for entry_type, count, type_difficulty_sum, type_difficulty_count in type_rows:
             entry_stats[entry_type.value] = count
+            difficulty_sum += type_difficulty_sum or 0
+            difficulty_count += type_difficulty_count
+        
+        avg_difficulty = difficulty_sum / difficulty_count if difficulty_count else 3
         
-        recent_entries = db.query(Entry).filter(
+        # Only the summarized columns, with the reflection outer-joined
+        # into the same row: no ORM objects and no second query.
+        recent_entries = db.query(
+            Entry.entry_type,
+            Entry.title,
+            Entry.difficulty,
+            Entry.created_at,
+            Reflection.id,
+            func.substr(Reflection.initial_blocker, 1, 100),
+            func.substr(Reflection.key_pattern, 1, 100),
+        ).outerjoin(Reflection).filter(
             Entry.is_complete == True,
-            Entry.created_at >= datetime.utcnow() - timedelta(days=30)
+            Entry.created_at >= now - timedelta(days=30)
         ).order_by(Entry.created_at.desc()).limit(20).all()
         
         recent_summary = []
-        for entry in recent_entries:
+        active_days = set()
+        for entry_type, title, difficulty, created_at, reflection_id, blocker, pattern in recent_entries:
+            active_days.add(created_at.date())
             summary = {
-                "type": entry.entry_type.value,
-                "title": entry.title,
-                "difficulty": entry.difficulty,
-                "days_ago": (datetime.utcnow() - entry.created_at).days
+                "type": entry_type.value,
+                "title": title,
+                "difficulty": difficulty,
+                "days_ago": (now - created_at).days
             }
-            if entry.reflection:
-                summary["blocker"] = entry.reflection.initial_blocker[:100]
-                summary["pattern"] = entry.reflection.key_pattern[:100]
+            if reflection_id is not None:
+                summary["blocker"] = blocker
+                summary["pattern"] = pattern
             recent_summary.append(summary)
         
-        blockers = db.query(Reflection.initial_blocker).join(Entry).filter(
-            Entry.is_complete == True
-        ).limit(50).all()
-        blocker_texts = [b[0][:100] for b in blockers if b[0]]
+        # Filtered, truncated and limited in SQL: ten short strings
+        # come back instead of fifty full blocker texts.
+        blockers = db.query(func.substr(Reflection.initial_blocker, 1, 100)).join(Entry).filter(
+            Entry.is_complete == True,
+            Reflection.initial_blocker != ""
+        ).limit(10).all()
+        blocker_texts = [text for (text,) in blockers]
         
-        patterns = db.query(Pattern).filter(
+        patterns = db.query(Pattern.name).filter(
             Pattern.usage_count > 0
         ).order_by(Pattern.usage_count.desc()).limit(20).all()
-        pattern_names = [p.name for p in patterns]
-        
-        difficulties = db.query(Entry.difficulty).filter(
-            Entry.is_complete == True,
-            Entry.difficulty.isnot(None)
-        ).all()
-        avg_difficulty = sum(d[0] for d in difficulties) / len(difficulties) if difficulties else 3
+        pattern_names = [name for (name,) in patterns]
         
         return {
             "entry_stats": entry_stats,
             "total_entries": sum(entry_stats.values()),
             "recent_entries": recent_summary,
-            "common_blockers": blocker_texts[:10],
+            "common_blockers": blocker_texts,
             "learned_patterns": pattern_names,
             "average_difficulty": round(avg_difficulty, 1),
-            "active_days": len(set(e.created_at.date() for e in recent_entries))
+            "active_days": len(active_days)
         }
     
-    def _build_recommendation_chain(self):
-        """Build LangChain for generating recommendations."""
+    @staticmethod
+    def _build_recommendation_prompt(format_instructions: str) -> ChatPromptTemplate:
+        """
+        Build the recommendation generation prompt.
         
-        system_prompt = """You are an expert mentor for developers learning DSA, competitive programming, 
-backend development, and AI/ML. Generate personalized learning recommendations based on the user's history.
+        WHY two system messages: The first holds everything that is the
+        same on every call, as a finished message that is never
+        re-formatted, so each call only renders the short templated
+        tail. Gemini joins them into one system instruction, static part
+        first, so implicit prefix caching can reuse it across calls.
+        """
+        return ChatPromptTemplate.from_messages([
+            SystemMessage(content=RECOMMENDATION_GUIDELINES + "\n\n" + format_instructions),
+            ("system", """USER PROFILE:
+{user_context}
+
+Generate {count} recommendations based on the user's current focus: {focus}"""),
+            ("human", "Generate personalized recommendations for the domains: {domains}")
+        ])
+    
+    @staticmethod
+    def _build_quick_prompt() -> ChatPromptTemplate:
+        """Build the single quick recommendation prompt."""
+        return ChatPromptTemplate.from_messages([
+            ("system", """You are a quick learning advisor. Based on the user's profile, 
+suggest ONE thing they can do right now in {minutes} minutes.
 
 USER PROFILE:
-{user_context}
+{context}
 
-GENERATION GUIDELINES:
-1. **Analyze Patterns**: Look at what they've worked on, where they struggled, what patterns they've learned
-2. **Identify Gaps**: What fundamental concepts might they be missing?
-3. **Build Progressively**: Recommendations should build on what they know
-4. **Mix Types**: Include different types (problems, concepts, resources, revisions)
-5. **Be Specific**: Give specific problem names, resource links when possible
-6. **Explain WHY**: The reasoning field is crucial - explain why THIS recommendation for THIS user
+Be specific. If it's a problem, name it. If it's a concept, name it.
+Focus on: {domain}
 
-DIFFICULTY MAPPING:
-- Level 1-2: Beginner (basic concepts, easy LeetCode)
-- Level 3: Intermediate (medium LeetCode, real projects)
-- Level 4-5: Advanced (hard problems, system design)
+{format_instructions}"""),
+            ("human", "What should I do right now?")
+        ])
+    
+    @staticmethod
+    def _build_skill_gap_prompt() -> ChatPromptTemplate:
+        """Build the skill gap analysis prompt."""
+        return ChatPromptTemplate.from_messages([
+            ("system", """Analyze this developer's skill levels based on their learning history.
 
-RESOURCE SUGGESTIONS:
-- DSA/CP: LeetCode, NeetCode, Codeforces, AtCoder
-- Backend: FastAPI docs, Real Python, System Design Primer
-- AI/ML: Fast.ai, Andrew Ng courses, Papers with Code
+USER DATA:
+{context}
 
-{format_instructions}
+For each domain (DSA, CP, Backend, AI/ML), provide:
+1. Estimated current level (1-10)
+2. Identified gaps (what they seem to be missing)
+3. Strengths (what they're doing well)
+4. Areas to improve
+5. Suggested next focus
 
-Generate {count} recommendations based on the user's current focus: {focus}"""
+{format_instructions}"""),
+            ("human", "Analyze my skill gaps")
+        ])
+    
+    @staticmethod
+    def _build_bundle_prompt(format_instructions: str) -> ChatPromptTemplate:
+        """
+        Build the prompt asking for everything the recommendations page shows.
+        
+        Split into a static and a templated system message like the
+        recommendation prompt.
+        """
+        static_prompt = RECOMMENDATION_GUIDELINES + """
+
+In the same answer, also provide:
+- quick_recommendation: ONE thing they can do right now in the available
+  minutes given below. Be specific. If it's a problem, name it. If it's a
+  concept, name it.
+- skill_gaps: for each domain (DSA, CP, Backend, AI/ML), their estimated
+  current level (1-10), identified gaps, strengths, areas to improve and
+  suggested next focus.
+
+""" + format_instructions
+
+        return ChatPromptTemplate.from_messages([
+            SystemMessage(content=static_prompt),
+            ("system", """USER PROFILE:
+{user_context}
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
+Available minutes right now: {minutes}
+
+Generate {count} recommendations based on the user's current focus: {focus}"""),
             ("human", "Generate personalized recommendations for the domains: {domains}")
         ])
-        
-        return prompt | self.llm | self.parser
     
-    def generate_recommendations(
+    async def generate_recommendations(
         self,
         db: Session,
         domains: Optional[List[str]] = None,
@@ -197,6 +434,10 @@ Generate {count} recommendations based on the user's current focus: {focus}"""
             
         Returns:
             List of recommendation dictionaries
+        
+        WHY async: Like plan generation, the Gemini call takes seconds;
+        awaiting it frees the event loop. The SQLite work around it is
+        milliseconds and stays on the sync session.
         """
         if not self.llm:
             raise ValueError("Gemini API key not configured")
@@ -204,18 +445,16 @@ Generate {count} recommendations based on the user's current focus: {focus}"""
         user_context = self._get_user_context(db)
         
         if difficulty_preference:
-            user_context["difficulty_preference"] = difficulty_preference
-        
-        if not self._recommendation_chain:
-            self._recommendation_chain = self._build_recommendation_chain()
+            user_context = {**user_context, "difficulty_preference": difficulty_preference}
         
         domains_str = ", ".join(domains) if domains else "all areas"
         focus_str = current_focus or "general improvement"
         
+        # Not served from the response cache: an explicit generate always
+        # asks the model for a fresh set.
         try:
-            result = self._recommendation_chain.invoke({
-                "user_context": json.dumps(user_context, indent=2),
-                "format_instructions": self.parser.get_format_instructions(),
+            result = await self._recommendation_chain.ainvoke({
+                "user_context": _compact_json(user_context),
                 "count": count,
                 "focus": focus_str,
                 "domains": domains_str
@@ -226,16 +465,78 @@ Generate {count} recommendations based on the user's current focus: {focus}"""
         except Exception as e:
             raise ValueError(f"Recommendation generation failed: {str(e)}")
     
+    async def generate_all(
+        self,
+        db: Session,
+        domains: Optional[List[str]] = None,
+        count: int = 5,
+        current_focus: Optional[str] = None,
+        difficulty_preference: Optional[int] = None,
+        available_minutes: int = 30
+    ) -> dict:
+        """
+        Generate recommendations, a quick pick and skill gaps together.
+        
+        WHY: A page showing all three would otherwise make three Gemini
+        calls that each send the same user context. One call sends it
+        once and lets the model reason about the profile once.
+        
+        Returns:
+            Dict with recommendations (saved like generate_recommendations),
+            weekly_focus, quick_recommendation and skill_gaps
+        """
+        if not self.llm:
+            raise ValueError("Gemini API key not configured")
+        
+        user_context = self._get_user_context(db)
+        
+        # analyze_skill_gaps keys on the plain context, so it can reuse
+        # the gaps generated here.
+        skill_gap_cache_key = _response_cache_key("skill_gaps", user_context)
+        
+        if difficulty_preference:
+            user_context = {**user_context, "difficulty_preference": difficulty_preference}
+        
+        domains_str = ", ".join(domains) if domains else "all areas"
+        focus_str = current_focus or "general improvement"
+        
+        # Like generate_recommendations, never served from the cache.
+        try:
+            result = await self._bundle_chain.ainvoke({
+                "user_context": _compact_json(user_context),
+                "count": count,
+                "focus": focus_str,
+                "domains": domains_str,
+                "minutes": available_minutes
+            })
+        except Exception as e:
+            raise ValueError(f"Recommendation generation failed: {str(e)}")
+        
+        bundle = {
+            "recommendations": self._process_recommendations(result, db),
+            "weekly_focus": result.get("weekly_focus"),
+            "quick_recommendation": result.get("quick_recommendation"),
+            "skill_gaps": result.get("skill_gaps", []),
+        }
+        cache.set(skill_gap_cache_key, bundle["skill_gaps"], settings.RECOMMENDATION_CACHE_TTL_SECONDS)
+        return bundle
+    
     def _process_recommendations(self, result: dict, db: Session) -> List[dict]:
-        """Process and save recommendations to database."""
+        """
+        Process and save recommendations to database.
+        
+        All rows go in as one executemany INSERT, not one ORM flush
+        per recommendation.
+        """
         recommendations = []
+        rows = []
         
         for rec in result.get("recommendations", []):
             rec_type = self._map_rec_type(rec.get("rec_type", "concept"))
             domain = self._map_domain(rec.get("domain", "general"))
             priority = self._map_priority(rec.get("priority", "medium"))
             
-            db_rec = Recommendation(
+            rows.append(dict(
                 title=rec.get("title", "Untitled"),
                 description=rec.get("description", ""),
                 rec_type=rec_type,
@@ -250,50 +551,27 @@ Generate {count} recommendations based on the user's current focus: {focus}"""
                 prerequisites=rec.get("prerequisites", []),
                 confidence_score=0.8,
                 generated_by="gemini-2.5-flash"
-            )
-            
-            db.add(db_rec)
+            ))
             recommendations.append(rec)
         
+        if rows:
+            db.execute(insert(Recommendation), rows)
         db.commit()
         return recommendations
     
     def _map_rec_type(self, type_str: str) -> RecommendationType:
         """Map string to RecommendationType enum."""
-        mapping = {
-            "problem": RecommendationType.PROBLEM,
-            "concept": RecommendationType.CONCEPT,
-            "resource": RecommendationType.RESOURCE,
-            "practice": RecommendationType.PRACTICE,
-            "revision": RecommendationType.REVISION,
-            "project": RecommendationType.PROJECT,
-            "challenge": RecommendationType.CHALLENGE,
-        }
-        return mapping.get(type_str.lower(), RecommendationType.CONCEPT)
+        return self._REC_TYPE_MAP.get(type_str.lower(), RecommendationType.CONCEPT)
     
     def _map_domain(self, domain_str: str) -> RecommendationDomain:
         """Map string to RecommendationDomain enum."""
-        mapping = {
-            "dsa": RecommendationDomain.DSA,
-            "cp": RecommendationDomain.CP,
-            "backend": RecommendationDomain.BACKEND,
-            "ai_ml": RecommendationDomain.AI_ML,
-            "system_design": RecommendationDomain.SYSTEM_DESIGN,
-            "general": RecommendationDomain.GENERAL,
-        }
-        return mapping.get(domain_str.lower(), RecommendationDomain.GENERAL)
+        return self._DOMAIN_MAP.get(domain_str.lower(), RecommendationDomain.GENERAL)
     
     def _map_priority(self, priority_str: str) -> RecommendationPriority:
         """Map string to RecommendationPriority enum."""
-        mapping = {
-            "critical": RecommendationPriority.CRITICAL,
-            "high": RecommendationPriority.HIGH,
-            "medium": RecommendationPriority.MEDIUM,
-            "low": RecommendationPriority.LOW,
-        }
-        return mapping.get(priority_str.lower(), RecommendationPriority.MEDIUM)
+        return self._PRIORITY_MAP.get(priority_str.lower(), RecommendationPriority.MEDIUM)
     
-    def get_quick_recommendation(
+    async def get_quick_recommendation(
         self, 
         db: Session, 
         available_minutes: int = 30,
@@ -309,55 +587,43 @@ Generate {count} recommendations based on the user's current focus: {focus}"""
         
         user_context = self._get_user_context(db)
         
-        quick_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a quick learning advisor. Based on the user's profile, 
-suggest ONE thing they can do right now in {minutes} minutes.
-
-USER PROFILE:
-{context}
-
-Be specific. If it's a problem, name it. If it's a concept, name it.
-Focus on: {domain}
-
-Return JSON:
-{{
-    "title": "specific action to take",
-    "description": "brief explanation",
-    "rec_type": "problem|concept|resource|practice",
-    "domain": "dsa|cp|backend|ai_ml|general",
-    "reasoning": "why this specifically",
-    "resource_url": "link if applicable",
-    "estimated_minutes": {minutes}
-}}"""),
-            ("human", "What should I do right now?")
-        ])
+        try:
+            return await self._quick_chain.ainvoke({
+                "minutes": available_minutes,
+                "context": _compact_json(user_context),
+                "domain": domain or "anything"
+            })
+        except Exception as e:
+            raise ValueError(f"Quick recommendation failed: {str(e)}")
+    
+    def stream_quick_recommendation(
+        self, 
+        db: Session, 
+        available_minutes: int = 30,
+        domain: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Stream the quick recommendation as it is generated.
         
-        chain = quick_prompt | self.llm
+        WHY: This is the call where latency matters most. The JSON
+        parser yields the object parsed so far after every chunk, so
+        the title can be shown while the rest is still generating.
         
-        result = chain.invoke({
+        The user context is read here, before the stream starts, so
+        the caller's session is only used during the request.
+        """
+        if not self.llm:
+            raise ValueError("Gemini API key not configured")
+        
+        user_context = self._get_user_context(db)
+        
+        return self._quick_chain.astream({
             "minutes": available_minutes,
-            "context": json.dumps(user_context),
+            "context": _compact_json(user_context),
             "domain": domain or "anything"
         })
-        
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', result.content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        return {
-            "title": "Review a past entry",
-            "description": "Go through your recent entries and reinforce the patterns",
-            "rec_type": "revision",
-            "domain": "general",
-            "reasoning": "Revision strengthens learning",
-            "estimated_minutes": available_minutes
-        }
     
-    def analyze_skill_gaps(self, db: Session) -> List[dict]:
+    async def analyze_skill_gaps(self, db: Session) -> List[dict]:
         """
         Analyze user's skill gaps across domains.
         
@@ -368,66 +634,38 @@ Return JSON:
         
         user_context = self._get_user_context(db)
         
-        analysis_prompt = ChatPromptTemplate.from_messages([
-            ("system", """Analyze this developer's skill levels based on their learning history.
-
-USER DATA:
-{context}
-
-For each domain (DSA, CP, Backend, AI/ML), provide:
-1. Estimated current level (1-10)
-2. Identified gaps (what they seem to be missing)
-3. Strengths (what they're doing well)
-4. Areas to improve
-5. Suggested next focus
-
-Return JSON array:
-[
-    {{
-        "domain": "dsa",
-        "current_level": 5,
-        "gaps": ["dynamic programming", "graph algorithms"],
-        "strengths": ["arrays", "basic recursion"],
-        "improvement_areas": ["complexity analysis", "optimization"],
-        "suggested_focus": "Start with 2D DP problems"
-    }},
-    ...
-]"""),
-            ("human", "Analyze my skill gaps")
-        ])
-        
-        chain = analysis_prompt | self.llm
-        
-        result = chain.invoke({
-            "context": json.dumps(user_context)
-        })
+        cache_key = _response_cache_key("skill_gaps", user_context)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            import re
-            json_match = re.search(r'\[.*\]', result.content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        return [
-            {
-                "domain": "general",
-                "current_level": 5,
-                "gaps": ["Need more data to analyze"],
-                "strengths": ["Consistent practice"],
-                "improvement_areas": ["Keep logging entries"],
-                "suggested_focus": "Continue building your learning history"
-            }
-        ]
+            result = await self._skill_gap_chain.ainvoke({
+                "context": _compact_json(user_context)
+            })
+        except Exception as e:
+            raise ValueError(f"Skill gap analysis failed: {str(e)}")
+        
+        gaps = result.get("skill_gaps", [])
+        cache.set(cache_key, gaps, settings.RECOMMENDATION_CACHE_TTL_SECONDS)
+        return gaps
 
 
 _recommendation_service: Optional[RecommendationService] = None
+_recommendation_service_lock = threading.Lock()
 
 
 def get_recommendation_service() -> RecommendationService:
-    """Get or create the recommendation service singleton."""
+    """
+    Get or create the recommendation service singleton.
+    
+    WHY the lock: Concurrent first requests would otherwise each build
+    a service, and with it a Gemini client and its HTTP connections.
+    The unlocked check keeps every later call lock-free.
+    """
     global _recommendation_service
     if _recommendation_service is None:
-        _recommendation_service = RecommendationService()
+        with _recommendation_service_lock:
+            if _recommendation_service is None:
+                _recommendation_service = RecommendationService()
     return _recommendation_service
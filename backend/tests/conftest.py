@@ -0,0 +1,42 @@
+"""
+Shared pytest fixtures.
+
+WHY: Tests run against a private in-memory SQLite database, so they
+never touch thinking_os.db and each test starts from empty tables.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from cache import cache
+from database import Base
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory database with every table created."""
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+    
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    cache.invalidate("")
+    try:
+        yield session
+    finally:
+        session.close()
+        cache.invalidate("")
+        engine.dispose()
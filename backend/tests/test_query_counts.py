@@ -0,0 +1,93 @@
+"""
+Query-count regression tests.
+
+WHY: N+1 queries don't fail anything, they just get slower as data
+grows. Counting the statements a hot path issues, against more rows
+than it summarizes, catches a per-row query the moment it comes back.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+from models import Entry, EntryType, Pattern, Reflection
+from services.recommendation_service import RecommendationService
+
+
+# One GROUP BY for per-type stats, plus recent entries, blockers and
+# patterns: see RecommendationService._build_user_context.
+MAX_USER_CONTEXT_QUERIES = 4
+
+
+@contextmanager
+def count_queries(session) -> Iterator[List[str]]:
+    """
+    Collect every SQL statement the session's engine runs in the block.
+    
+    Yields the list the statements are appended to, so the caller can
+    assert on its length (and print it when the assertion fails).
+    """
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed_history(db, entries_per_type: int = 5):
+    """Complete entries of every type, half of them with reflections."""
+    now = datetime.utcnow()
+    for i, entry_type in enumerate(list(EntryType) * entries_per_type):
+        entry = Entry(
+            title=f"Entry {i}",
+            entry_type=entry_type,
+            difficulty=i % 5 + 1,
+            is_complete=True,
+            created_at=now - timedelta(days=i % 40),
+        )
+        db.add(entry)
+        db.flush()
+        if i % 2:
+            db.add(Reflection(
+                entry_id=entry.id,
+                context="Context",
+                initial_blocker=f"Blocker {i}",
+                trigger_signal="Signal",
+                key_pattern="Two pointers",
+                mistake_or_edge_case="Off by one",
+            ))
+    for i in range(3):
+        db.add(Pattern(name=f"Pattern {i}", usage_count=i + 1))
+    db.commit()
+    db.expunge_all()
+
+
+def test_user_context_query_count_is_constant(db):
+    _seed_history(db)
+    
+    with count_queries(db) as statements:
+        context = RecommendationService()._build_user_context(db)
+    
+    assert context["total_entries"] == 5 * len(EntryType)
+    assert context["recent_entries"]
+    assert len(statements) <= MAX_USER_CONTEXT_QUERIES, statements
+
+
+def test_user_context_is_served_from_cache(db):
+    _seed_history(db, entries_per_type=1)
+    service = RecommendationService()
+    
+    with count_queries(db) as statements:
+        first = service._get_user_context(db)
+        second = service._get_user_context(db)
+    
+    assert second is first
+    assert len(statements) <= MAX_USER_CONTEXT_QUERIES, statements